@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import math
+import time
+import weakref
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Header
+from fastapi.responses import StreamingResponse
+
+from . import metrics
+from .config import settings
+
+
+# Lower rank is served first
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+
+class AdmissionRejected(Exception):
+    """Request turned away before doing any work; mapped to 429/503 + Retry-After in app.main."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int) -> None:
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Slot:
+    """An admitted request's share of the budget (`weight` units of it). release() is idempotent."""
+
+    def __init__(self, controller: "AdmissionController", priority: str, weight: int = 1) -> None:
+        self.controller = controller
+        self.priority = priority
+        self.weight = weight
+        self.started = time.monotonic()
+        self.released = False
+        self._loop = asyncio.get_running_loop()
+
+    def release(self) -> None:
+        if self.released:
+            return
+        self.released = True
+        held_for = time.monotonic() - self.started
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop or self._loop.is_closed():
+            self.controller._release(self.priority, held_for, self.weight)
+        else:
+            # e.g. from a garbage-collection finalizer in another thread: waiters belong to the loop
+            self._loop.call_soon_threadsafe(self.controller._release, self.priority, held_for, self.weight)
+
+
+class AdmissionController:
+    """
+    One concurrency budget shared by the chat endpoints (per worker process): at most
+    `max_in_flight` units are in use, optionally fewer by a given priority (`limits`, e.g.
+    batch), and up to `max_queue` more requests wait. A request holds one unit, or `weight`
+    units when it fans out (a batch holds one per concurrent LLM call). Waiters are admitted
+    in priority order, so interactive requests overtake queued batch work from any endpoint.
+    A waiter not admitted within `queue_timeout` seconds is rejected instead of timing out
+    later. Single event loop only.
+
+    - queue full: 429. If the newcomer outranks a queued request, that request is shed instead (503).
+    - waited past queue_timeout: 503
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_in_flight: int,
+        max_queue: int,
+        queue_timeout: float,
+        limits: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.limits = limits or {}
+        self.in_flight = 0
+        self.running: Counter = Counter()
+        # (rank, seq, priority, endpoint, weight, future); kept sorted, so the list is in admission order
+        self._waiters: List[Tuple[int, int, str, str, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        # EWMA of time a request holds its slot, used to size Retry-After
+        self._service_time = 1.0
+        self._publish()
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for w in self._waiters if not w[5].done())
+
+    def _publish(self) -> None:
+        metrics.set_gauge("admission_in_flight", self.in_flight, controller=self.name)
+        metrics.set_gauge("admission_queue_depth", self.queue_depth, controller=self.name)
+        for priority in PRIORITIES:
+            metrics.set_gauge("admission_in_flight", self.running[priority], controller=self.name, priority=priority)
+
+    def _retry_after(self) -> int:
+        waves = (self.queue_depth + 1) / max(self.max_in_flight, 1)
+        return max(1, math.ceil(self._service_time * waves))
+
+    def _reject(self, status_code: int, reason: str, endpoint: str, priority: str) -> AdmissionRejected:
+        metrics.incr("admission_rejected", endpoint=endpoint, reason=reason, priority=priority)
+        return AdmissionRejected(status_code, f"{endpoint}: {reason}", self._retry_after())
+
+    def _weight(self, priority: str, weight: int) -> int:
+        """Clamp a request's weight to what the budget can ever grant it, so it is never stuck."""
+        cap = min(self.max_in_flight, self.limits.get(priority, self.max_in_flight))
+        return max(1, min(weight, cap))
+
+    def _can_run(self, priority: str, weight: int) -> bool:
+        limit = self.limits.get(priority)
+        return self.in_flight + weight <= self.max_in_flight and (
+            limit is None or self.running[priority] + weight <= limit
+        )
+
+    def _grant(self, priority: str, weight: int) -> None:
+        self.in_flight += weight
+        self.running[priority] += weight
+
+    def _dispatch(self) -> None:
+        """Admit queued requests, best priority first, while the budget allows."""
+        self._waiters = [w for w in self._waiters if not w[5].done()]
+        for w in list(self._waiters):
+            if self.in_flight >= self.max_in_flight:
+                break
+            if self._can_run(w[2], w[4]):
+                self._grant(w[2], w[4])
+                w[5].set_result(None)
+        self._waiters = [w for w in self._waiters if not w[5].done()]
+        self._publish()
+
+    def _shed_lowest(self, rank: int) -> bool:
+        """Drop the newest queued request of the lowest priority below `rank`, if any."""
+        candidates = [w for w in self._waiters if not w[5].done() and w[0] > rank]
+        if not candidates:
+            return False
+        victim = max(candidates, key=lambda w: (w[0], w[1]))
+        victim[5].set_exception(self._reject(503, "shed for higher-priority traffic", victim[3], victim[2]))
+        metrics.incr("admission_shed", controller=self.name, priority=victim[2])
+        return True
+
+    async def hold(self, priority: str = "interactive", endpoint: str = "", weight: int = 1) -> Slot:
+        """
+        Wait for a slot of `weight` units, clamped to what `priority` may use (the granted
+        amount is Slot.weight); the caller must release() it (see slot() for the scoped form).
+        """
+        endpoint = endpoint or self.name
+        rank = PRIORITIES.get(priority, PRIORITIES["interactive"])
+        weight = self._weight(priority, weight)
+        ahead = any(w[0] <= rank and not w[5].done() for w in self._waiters)
+        if not ahead and self._can_run(priority, weight):
+            self._grant(priority, weight)
+            self._publish()
+            metrics.observe("admission_wait_seconds", 0.0, endpoint=endpoint, priority=priority)
+            return Slot(self, priority, weight)
+        if self.queue_depth >= self.max_queue and not self._shed_lowest(rank):
+            raise self._reject(429, "queue full", endpoint, priority)
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((rank, next(self._seq), priority, endpoint, weight, future))
+        self._waiters.sort(key=lambda w: (w[0], w[1]))
+        self._publish()
+        started = time.monotonic()
+
+        def granted() -> bool:
+            return future.done() and not future.cancelled() and future.exception() is None
+
+        try:
+            # shield: a timeout must not cancel a slot that _dispatch() is handing over right now
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not granted():
+                future.cancel()
+                self._dispatch()
+                raise self._reject(503, "queue wait timed out", endpoint, priority)
+            # admitted at the last moment: keep the slot
+        except asyncio.CancelledError:
+            # client went away while queued; give back the slot if we had just been given it
+            if granted():
+                self._release(priority, None, weight)
+            else:
+                future.cancel()
+                self._dispatch()
+            raise
+        finally:
+            metrics.observe("admission_wait_seconds", time.monotonic() - started, endpoint=endpoint, priority=priority)
+        return Slot(self, priority, weight)
+
+    def _release(self, priority: str, held_for: Optional[float], weight: int = 1) -> None:
+        if held_for is not None:
+            self._service_time = 0.8 * self._service_time + 0.2 * held_for
+        self.in_flight -= weight
+        self.running[priority] -= weight
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: str = "interactive", endpoint: str = ""):
+        held = await self.hold(priority, endpoint)
+        try:
+            yield held
+        finally:
+            held.release()
+
+
+_controllers: Dict[str, AdmissionController] = {}
+
+
+def get_controller(name: str = "chat") -> AdmissionController:
+    """The budget shared by /chat, /chats/{id}/messages and /chat/batch."""
+    if name not in _controllers:
+        _controllers[name] = AdmissionController(
+            name,
+            settings.admission_max_in_flight,
+            settings.admission_max_queue,
+            settings.admission_queue_timeout_seconds,
+            limits={"batch": settings.batch_admission_max_in_flight},
+        )
+    return _controllers[name]
+
+
+def request_priority(x_priority: Optional[str], default: str) -> str:
+    """The X-Priority header's priority, never better than `default`: clients can only lower it."""
+    value = (x_priority or default).strip().lower()
+    if value not in PRIORITIES:
+        return default
+    return max(value, default, key=PRIORITIES.__getitem__)
+
+
+def admission(endpoint: str, default_priority: str = "interactive"):
+    """
+    FastAPI dependency factory: hold a slot of the shared chat budget for the duration of the
+    request. Clients can lower their own priority with `X-Priority: batch` (eval/pre-warm jobs).
+    """
+
+    async def _dependency(x_priority: Optional[str] = Header(default=None)):
+        if not settings.admission_enabled:
+            yield
+            return
+        async with get_controller().slot(request_priority(x_priority, default_priority), endpoint):
+            yield
+
+    return _dependency
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that releases its admission slot once the response is finished, however
+    it ends: body streamed, client gone before the first chunk, send failure, or the response
+    never being sent at all (released when it is garbage collected).
+    """
+
+    def __init__(self, content, slot: Optional[Slot], **kwargs) -> None:
+        super().__init__(content, **kwargs)
+        self.slot = slot
+        if slot is not None:
+            weakref.finalize(self, slot.release)
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.slot is not None:
+                self.slot.release()
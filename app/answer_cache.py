@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from .cache import get_cache, make_key
+from .config import settings
+from .generation import read_current
+from .tenancy import collection_for, resolve_tenant
+
+
+# Generated /chat answers, opt-in via ANSWER_CACHE_ENABLED: a hit returns a previous answer for
+# the same question instead of sampling a new one. Keyed under the tenant's index generation,
+# so a re-ingest retires every cached answer for that tenant.
+NAMESPACE = "answer"
+
+
+def answer_key(question: str, top_k: int, temperature: float, tenant: Optional[str] = None) -> str:
+    tenant = resolve_tenant(tenant)
+    stamp = read_current().stamp(tenant)
+    return make_key(stamp, collection_for(tenant), settings.llm_model, question, top_k, temperature)
+
+
+def cacheable_model(model: Optional[str]) -> bool:
+    """Only primary-model answers are cached: a fallback answer must not outlive the outage."""
+    return model == settings.llm_model
+
+
+def get_answer(key: str) -> Optional[Dict[str, Any]]:
+    """Cached ChatResponse as a dict, or None."""
+    return get_cache().get(NAMESPACE, key)
+
+
+def set_answer(key: str, response: Dict[str, Any]) -> None:
+    get_cache().set(NAMESPACE, key, response)
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator, List, Optional
+
+from .config import settings
+from .llm import get_chat_model, get_embeddings
+from .models import BatchChatResult
+from .prompts import build_qa_prompt, to_source_items
+from .retrieval import retrieve_many
+from .vector_store import get_vector_store
+
+
+def _retrieve_batch(questions: List[str], top_k: int, tenant: Optional[str]):
+    """Embed all uncached questions in one batched call and query the store for them at once."""
+    vs = get_vector_store(get_embeddings(), tenant=tenant)
+    return [[doc for doc, _ in hits] for hits in retrieve_many(vs, questions, k=top_k, tenant=tenant)]
+
+
+async def retrieve_batch(questions: List[str], top_k: int = 4, tenant: Optional[str] = None):
+    """Documents for each question, in input order (runs the blocking retrieval off the loop)."""
+    return await asyncio.to_thread(_retrieve_batch, questions, top_k, tenant)
+
+
+async def answer_questions(
+    questions: List[str],
+    top_k: int = 4,
+    temperature: float = 0.2,
+    concurrency: Optional[int] = None,
+    tenant: Optional[str] = None,
+    docs_per_question: Optional[List] = None,
+) -> AsyncIterator[BatchChatResult]:
+    """Answer many questions against the knowledge base, yielding results as they complete.
+
+    Retrieval for the whole batch costs one embedding round trip and one vector query;
+    generation fans out with at most `concurrency` LLM calls in flight. Results are
+    yielded in completion order; use `BatchChatResult.index` to map them back.
+    Pass `docs_per_question` (from retrieve_batch) to skip the retrieval step.
+    """
+    limit = concurrency or settings.batch_max_concurrency
+    if docs_per_question is None:
+        docs_per_question = await retrieve_batch(questions, top_k, tenant)
+
+    llm = get_chat_model(temperature=temperature)
+    semaphore = asyncio.Semaphore(limit)
+
+    async def _answer(index: int, question: str, docs) -> BatchChatResult:
+        if not docs:
+            return BatchChatResult(
+                index=index,
+                question=question,
+                error="No data found in the knowledge base. Please ingest documents first.",
+            )
+        async with semaphore:
+            try:
+                response, model = await llm.ainvoke_with_model(build_qa_prompt(question, docs))
+            except Exception as e:
+                return BatchChatResult(index=index, question=question, error=str(e))
+        answer = response.content if hasattr(response, "content") else str(response)
+        return BatchChatResult(index=index, question=question, answer=answer, sources=to_source_items(docs), model=model)
+
+    tasks = [
+        asyncio.create_task(_answer(i, q, docs))
+        for i, (q, docs) in enumerate(zip(questions, docs_per_question))
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client went away or caller stopped iterating: don't leave LLM calls running
+        for t in tasks:
+            t.cancel()
+
+
+def run_batch(
+    questions: List[str],
+    top_k: int = 4,
+    temperature: float = 0.2,
+    concurrency: Optional[int] = None,
+    tenant: Optional[str] = None,
+) -> List[BatchChatResult]:
+    """Synchronous entry point for scripts and notebooks; returns results in input order."""
+
+    async def _collect() -> List[BatchChatResult]:
+        return [r async for r in answer_questions(questions, top_k, temperature, concurrency, tenant)]
+
+    results = asyncio.run(_collect())
+    return sorted(results, key=lambda r: r.index)
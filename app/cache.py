@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+from . import metrics
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(*parts: Any) -> str:
+    """Stable cache key from arbitrary JSON-serialisable parts (query text, k, filters...)."""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class MemoryCache:
+    """Per-process LRU cache with TTL. Values are stored as-is (no serialisation)."""
+
+    def __init__(self, max_entries: int, ttl_seconds: int) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get((namespace, key))
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._data[(namespace, key)]
+                return None
+            self._data.move_to_end((namespace, key))
+            return value
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        expires_at = time.time() + (ttl_seconds or self.ttl_seconds)
+        with self._lock:
+            self._data[(namespace, key)] = (expires_at, value)
+            self._data.move_to_end((namespace, key))
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        with self._lock:
+            if namespace is None:
+                self._data.clear()
+            else:
+                for k in [k for k in self._data if k[0] == namespace]:
+                    del self._data[k]
+
+
+class SQLiteCache:
+    """
+    Cache shared by every worker process on the host, backed by one SQLite file in WAL mode
+    (concurrent readers, one writer at a time). Values must be JSON-serialisable.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: int) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads; keep one per thread (and per pid,
+        # so a connection inherited through fork is never reused)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        try:
+            row = self._conn().execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            # "database is locked" while another worker checkpoints the WAL: treat as a miss
+            metrics.incr("cache_errors", op="get")
+            return None
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: Optional[int] = None) -> None:
+        expires_at = time.time() + (ttl_seconds or self.ttl_seconds)
+        conn = None
+        try:
+            # Opening a connection runs PRAGMAs, which can hit "database is locked" too
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value), expires_at),
+            )
+            conn.commit()
+        except sqlite3.OperationalError:
+            # Database busy under heavy write contention: a missed cache write is harmless
+            if conn is not None:
+                conn.rollback()
+            metrics.incr("cache_errors", op="set")
+            return
+        # Cheap probabilistic trim instead of a background sweeper
+        if hash(key) % 100 == 0:
+            self._trim()
+
+    def _trim(self) -> None:
+        conn = None
+        try:
+            conn = self._conn()
+            conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+            conn.execute(
+                "DELETE FROM cache WHERE rowid IN ("
+                " SELECT rowid FROM cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.commit()
+        except sqlite3.OperationalError:
+            conn.rollback()
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        conn = None
+        try:
+            conn = self._conn()
+            if namespace is None:
+                conn.execute("DELETE FROM cache")
+            else:
+                conn.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+            conn.commit()
+        except sqlite3.OperationalError as e:
+            # Entries left behind expire by TTL (and generation-stamped keys stop matching)
+            if conn is not None:
+                conn.rollback()
+            metrics.incr("cache_errors", op="clear")
+            logger.warning("Could not clear shared cache %s: %s", self.path, e)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide cache selected by settings.cache_backend."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                if settings.cache_backend == "sqlite":
+                    _cache = SQLiteCache(settings.shared_cache_path, settings.cache_max_entries, settings.cache_ttl_seconds)
+                elif settings.cache_backend == "memory":
+                    _cache = MemoryCache(settings.cache_max_entries, settings.cache_ttl_seconds)
+                else:
+                    raise ValueError(f"Unknown CACHE_BACKEND: {settings.cache_backend!r} (expected 'memory' or 'sqlite')")
+    return _cache
@@ -3,7 +3,7 @@ from __future__ import annotations
 import os
 from typing import List, Optional
 
-from pydantic import Field
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -19,9 +19,76 @@ class Settings(BaseSettings):
     llm_model: str = Field(default=os.getenv("LLM_MODEL", "gemini-2.0-flash"), alias="LLM_MODEL")
     embedding_model: str = Field(default=os.getenv("EMBEDDING_MODEL", "text-embedding-004"), alias="EMBEDDING_MODEL")
 
+    # "google" (Gemini) or "fake": a local deterministic provider with injectable latency for tests/benchmarks
+    llm_provider: str = Field(default=os.getenv("LLM_PROVIDER", "google"), alias="LLM_PROVIDER")
+    fake_llm_latency_ms: int = Field(default=int(os.getenv("FAKE_LLM_LATENCY_MS", "0")), alias="FAKE_LLM_LATENCY_MS")
+    fake_embedding_latency_ms: int = Field(default=int(os.getenv("FAKE_EMBEDDING_LATENCY_MS", "0")), alias="FAKE_EMBEDDING_LATENCY_MS")
+
+    # Provider resilience: per-request deadline, per-call timeouts, hedging and circuit breaking
+    request_deadline_seconds: float = Field(default=float(os.getenv("REQUEST_DEADLINE_SECONDS", "60")), alias="REQUEST_DEADLINE_SECONDS")
+    llm_timeout_seconds: float = Field(default=float(os.getenv("LLM_TIMEOUT_SECONDS", "45")), alias="LLM_TIMEOUT_SECONDS")
+    embedding_timeout_seconds: float = Field(default=float(os.getenv("EMBEDDING_TIMEOUT_SECONDS", "10")), alias="EMBEDDING_TIMEOUT_SECONDS")
+    # Cheaper model used while the primary model's breaker is open (empty: fail fast instead)
+    llm_fallback_model: str = Field(default=os.getenv("LLM_FALLBACK_MODEL", ""), alias="LLM_FALLBACK_MODEL")
+    # Fire a second embedding call when the first exceeds this latency percentile of recent calls
+    hedge_percentile: float = Field(default=float(os.getenv("HEDGE_PERCENTILE", "95")), alias="HEDGE_PERCENTILE")
+    hedge_min_samples: int = Field(default=int(os.getenv("HEDGE_MIN_SAMPLES", "20")), alias="HEDGE_MIN_SAMPLES")
+    breaker_failure_threshold: int = Field(default=int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5")), alias="BREAKER_FAILURE_THRESHOLD")
+    breaker_reset_seconds: float = Field(default=float(os.getenv("BREAKER_RESET_SECONDS", "30")), alias="BREAKER_RESET_SECONDS")
+    provider_max_threads: int = Field(default=int(os.getenv("PROVIDER_MAX_THREADS", "32")), alias="PROVIDER_MAX_THREADS")
+
     # Vector store
     vector_store_dir: str = Field(default=os.getenv("VECTOR_STORE_DIR", "./chroma_db"), alias="VECTOR_STORE_DIR")
     collection_name: str = Field(default=os.getenv("COLLECTION_NAME", "rag_docs"), alias="COLLECTION_NAME")
+    # Requests without an X-Tenant-ID header; this tenant's chunks live in COLLECTION_NAME itself,
+    # other tenants get their own "<COLLECTION_NAME>__t_<tenant>" collection
+    default_tenant: str = Field(default=os.getenv("DEFAULT_TENANT", "default"), alias="DEFAULT_TENANT", validate_default=True)
+
+    # Index serving backend: "chroma" opens VECTOR_STORE_DIR directly (single process, read/write);
+    # "snapshot" serves the published read-only snapshot generation under INDEX_ROOT, memory-mapped
+    # so every worker process shares the same pages (see README "Multi-worker serving")
+    index_backend: str = Field(default=os.getenv("INDEX_BACKEND", "chroma"), alias="INDEX_BACKEND")
+    index_root: str = Field(default=os.getenv("INDEX_ROOT", "./index"), alias="INDEX_ROOT")
+
+    # Cache tier: "memory" is per process, "sqlite" is one file shared by all workers on the host
+    cache_backend: str = Field(default=os.getenv("CACHE_BACKEND", "memory"), alias="CACHE_BACKEND")
+    shared_cache_path: str = Field(default=os.getenv("SHARED_CACHE_PATH", "./cache/shared_cache.sqlite3"), alias="SHARED_CACHE_PATH")
+    cache_ttl_seconds: int = Field(default=int(os.getenv("CACHE_TTL_SECONDS", "86400")), alias="CACHE_TTL_SECONDS")
+    cache_max_entries: int = Field(default=int(os.getenv("CACHE_MAX_ENTRIES", "10000")), alias="CACHE_MAX_ENTRIES")
+
+    # Ingestion: chunking parameters and on-disk cache of parsed page text (empty dir disables the cache)
+    chunk_size: int = Field(default=int(os.getenv("CHUNK_SIZE", "800")), alias="CHUNK_SIZE")
+    chunk_overlap: int = Field(default=int(os.getenv("CHUNK_OVERLAP", "120")), alias="CHUNK_OVERLAP")
+    parse_cache_dir: str = Field(default=os.getenv("PARSE_CACHE_DIR", "./parse_cache"), alias="PARSE_CACHE_DIR")
+
+    # Batch question answering: cap on concurrent LLM calls per batch and on batch size
+    batch_max_concurrency: int = Field(default=int(os.getenv("BATCH_MAX_CONCURRENCY", "4")), alias="BATCH_MAX_CONCURRENCY")
+    batch_max_questions: int = Field(default=int(os.getenv("BATCH_MAX_QUESTIONS", "500")), alias="BATCH_MAX_QUESTIONS")
+
+    # Admission control shared by the chat endpoints (per worker): concurrent requests, queued requests, and how
+    # long a request may wait in the queue before being rejected with 503 + Retry-After
+    admission_enabled: bool = Field(default=os.getenv("ADMISSION_ENABLED", "true").lower() == "true", alias="ADMISSION_ENABLED")
+    admission_max_in_flight: int = Field(default=int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "8")), alias="ADMISSION_MAX_IN_FLIGHT")
+    admission_max_queue: int = Field(default=int(os.getenv("ADMISSION_MAX_QUEUE", "32")), alias="ADMISSION_MAX_QUEUE")
+    admission_queue_timeout_seconds: float = Field(default=float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "5")), alias="ADMISSION_QUEUE_TIMEOUT_SECONDS")
+    batch_admission_max_in_flight: int = Field(default=int(os.getenv("BATCH_ADMISSION_MAX_IN_FLIGHT", "4")), alias="BATCH_ADMISSION_MAX_IN_FLIGHT")
+
+    # Cache pre-warming from chat history (frequent + liked questions); optional /chat answer cache
+    prewarm_on_startup: bool = Field(default=os.getenv("PREWARM_ON_STARTUP", "false").lower() == "true", alias="PREWARM_ON_STARTUP")
+    prewarm_max_questions: int = Field(default=int(os.getenv("PREWARM_MAX_QUESTIONS", "100")), alias="PREWARM_MAX_QUESTIONS")
+    prewarm_scan_messages: int = Field(default=int(os.getenv("PREWARM_SCAN_MESSAGES", "5000")), alias="PREWARM_SCAN_MESSAGES")
+    prewarm_like_weight: float = Field(default=float(os.getenv("PREWARM_LIKE_WEIGHT", "3")), alias="PREWARM_LIKE_WEIGHT")
+    answer_cache_enabled: bool = Field(default=os.getenv("ANSWER_CACHE_ENABLED", "false").lower() == "true", alias="ANSWER_CACHE_ENABLED")
+
+    # Opt-in profiling endpoints under /admin/profile (not mounted unless enabled; need X-Admin-Token)
+    profiling_enabled: bool = Field(default=os.getenv("PROFILING_ENABLED", "false").lower() == "true", alias="PROFILING_ENABLED")
+    admin_token: str = Field(default=os.getenv("ADMIN_TOKEN", ""), alias="ADMIN_TOKEN")
+    profiling_max_seconds: float = Field(default=float(os.getenv("PROFILING_MAX_SECONDS", "60")), alias="PROFILING_MAX_SECONDS")
+
+    # Open the vector store and run one query at startup; /ready reports 503 until it succeeds
+    # (failed attempts are retried with backoff up to WARMUP_RETRY_MAX_SECONDS apart)
+    warmup_on_startup: bool = Field(default=os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true", alias="WARMUP_ON_STARTUP")
+    warmup_retry_max_seconds: float = Field(default=float(os.getenv("WARMUP_RETRY_MAX_SECONDS", "60")), alias="WARMUP_RETRY_MAX_SECONDS")
 
     # CORS / server - allow React dev server and production origins
     allowed_origins: List[str] = Field(
@@ -36,6 +103,12 @@ class Settings(BaseSettings):
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
+    @field_validator("default_tenant")
+    @classmethod
+    def _normalise_tenant(cls, value: str) -> str:
+        # Same normalisation as tenancy.resolve_tenant, so comparisons against it match
+        return value.strip().lower()
+
     def ensure_google_key_env(self) -> None:
         """
         Ensure the GOOGLE_API_KEY env var is set for langchain-google-genai client.
@@ -1,19 +1,18 @@
 from __future__ import annotations
 
 import os
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 
 
 # Load .env file at project root
 load_dotenv()
 
 MONGODB_URI = os.getenv("MONGODB_URI")
-if not MONGODB_URI:
-    # For safety, do not hardcode credentials here. Require the env var.
-    raise RuntimeError("MONGODB_URI not set in environment or .env file")
 
 _client: Optional[AsyncIOMotorClient] = None
 
@@ -21,6 +20,14 @@ _client: Optional[AsyncIOMotorClient] = None
 def get_client() -> AsyncIOMotorClient:
     global _client
     if _client is None:
+        if not MONGODB_URI:
+            # For safety, do not hardcode credentials here. Require the env var.
+            # Checked on first use rather than at import so the app can start (and
+            # answer /health) without Mongo configured.
+            raise RuntimeError("MONGODB_URI not set in environment or .env file")
+        # Imported lazily: motor/pymongo add noticeably to worker start-up time
+        from motor.motor_asyncio import AsyncIOMotorClient
+
         _client = AsyncIOMotorClient(MONGODB_URI)
     return _client
 
@@ -28,3 +35,12 @@ def get_client() -> AsyncIOMotorClient:
 def get_db(db_name: str = "ragchatbot") -> AsyncIOMotorDatabase:
     client = get_client()
     return client[db_name]
+
+
+async def ensure_indexes(db_name: str = "ragchatbot") -> None:
+    """Create the tenant-scoped indexes the chat routes query by. Idempotent."""
+    db = get_db(db_name)
+    # list_chats: tenant's chats by recency
+    await db.chats.create_index([("tenant_id", 1), ("updated_at", -1)])
+    # get_chat / post_message history: a chat's messages in order
+    await db.messages.create_index([("tenant_id", 1), ("chat_id", 1), ("created_at", 1)])
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from .cache import get_cache, make_key
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings client so query embeddings are served from the cache tier
+    (shared across workers when CACHE_BACKEND=sqlite). Document embeddings, used only
+    at ingestion, pass straight through.
+    """
+
+    NAMESPACE = "query_embedding"
+
+    def __init__(self, inner: Embeddings, model: str) -> None:
+        self.inner = inner
+        self.model = model
+
+    def _key(self, text: str) -> str:
+        return make_key(self.model, text)
+
+    def is_cached(self, text: str) -> bool:
+        return get_cache().get(self.NAMESPACE, self._key(text)) is not None
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        cache = get_cache()
+        key = self._key(text)
+        hit = cache.get(self.NAMESPACE, key)
+        if hit is not None:
+            return hit
+        vector = self.inner.embed_query(text)
+        cache.set(self.NAMESPACE, key, list(vector))
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Batched embed_query: cache hits are served locally, misses go out in one call."""
+        from .llm import embed_queries
+
+        cache = get_cache()
+        keys = [self._key(t) for t in texts]
+        out: List = [cache.get(self.NAMESPACE, k) for k in keys]
+        missing = [i for i, v in enumerate(out) if v is None]
+        if missing:
+            fresh = embed_queries(self.inner, [texts[i] for i in missing])
+            for i, vector in zip(missing, fresh):
+                out[i] = vector
+                cache.set(self.NAMESPACE, keys[i], list(vector))
+        return out
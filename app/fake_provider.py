@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from typing import Callable, List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from .config import settings
+
+
+# Local stand-in for Gemini (LLM_PROVIDER=fake): deterministic output, no network, and
+# latency/failures that tests and benchmarks can inject.
+
+
+def _fixed_latency(ms: int) -> Callable[[], float]:
+    return lambda: ms / 1000.0
+
+
+class FakeResponse:
+    def __init__(self, content: str) -> None:
+        self.content = content
+
+
+class FakeChatModel:
+    def __init__(
+        self,
+        model: str = "fake-chat",
+        latency: Optional[Callable[[], float]] = None,
+        fail: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        self.model = model
+        self.latency = latency or _fixed_latency(settings.fake_llm_latency_ms)
+        self.fail = fail or (lambda: False)
+        self.calls = 0
+
+    def _answer(self, prompt: str) -> FakeResponse:
+        self.calls += 1
+        if self.fail():
+            raise RuntimeError(f"{self.model}: injected provider failure")
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        return FakeResponse(f"[{self.model}] answer {digest}")
+
+    def invoke(self, prompt: str) -> FakeResponse:
+        time.sleep(self.latency())
+        return self._answer(prompt)
+
+    async def ainvoke(self, prompt: str) -> FakeResponse:
+        await asyncio.sleep(self.latency())
+        return self._answer(prompt)
+
+
+class FakeEmbeddings(Embeddings):
+    def __init__(
+        self,
+        size: int = 64,
+        latency: Optional[Callable[[], float]] = None,
+        fail: Optional[Callable[[], bool]] = None,
+    ) -> None:
+        self.size = size
+        self.latency = latency or _fixed_latency(settings.fake_embedding_latency_ms)
+        self.fail = fail or (lambda: False)
+        self.calls = 0
+
+    def _vector(self, text: str) -> List[float]:
+        # Hash-seeded unit vector: identical texts embed identically across processes
+        raw = hashlib.sha256(text.encode("utf-8")).digest()
+        values = [((raw[i % len(raw)] ^ (i * 31)) % 255) / 127.0 - 1.0 for i in range(self.size)]
+        norm = sum(v * v for v in values) ** 0.5 or 1.0
+        return [v / norm for v in values]
+
+    def _call(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        time.sleep(self.latency())
+        if self.fail():
+            raise RuntimeError("fake-embeddings: injected provider failure")
+        return [self._vector(t) for t in texts]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._call(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._call([text])[0]
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Batched query embedding in one provider call, like the Gemini client."""
+        return self._call(texts)
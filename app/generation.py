@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from .config import settings
+
+
+# Layout under settings.index_root:
+#   CURRENT                      {"generation": 7, "path": "generations/gen-000007", "tenants": {"acme": 3}}
+#   generations/gen-000007/      snapshot (manifest.json, embeddings.npy, records.jsonl)
+# CURRENT is only ever replaced atomically (write temp file + os.replace), so readers see
+# either the old or the new generation, never a partial one.
+CURRENT_FILE = "CURRENT"
+GENERATIONS_DIR = "generations"
+
+
+class Generation(NamedTuple):
+    number: int
+    path: Optional[Path]  # absolute snapshot directory, None if nothing has been published
+    tenants: Dict[str, int] = {}  # per-tenant write counters, bumped by that tenant's ingests
+
+    def stamp(self, tenant: str) -> Tuple[int, int]:
+        """Version of `tenant`'s index: changes on a publish or on a write to that tenant."""
+        return (self.number, self.tenants.get(tenant, 0))
+
+
+def _root() -> Path:
+    return Path(settings.index_root)
+
+
+_cached: Optional[Tuple[Tuple[str, int, int, int], Generation]] = None
+
+
+def read_current() -> Generation:
+    """Return the current generation. Cheap enough to call per request: re-reads only on change."""
+    global _cached
+    current = _root() / CURRENT_FILE
+    try:
+        st = current.stat()
+    except FileNotFoundError:
+        return Generation(0, None)
+    # os.replace gives CURRENT a new inode, so this changes on every write even within one mtime tick
+    stamp = (str(current), st.st_ino, st.st_mtime_ns, st.st_size)
+    if _cached is not None and _cached[0] == stamp:
+        return _cached[1]
+    data = json.loads(current.read_text(encoding="utf-8"))
+    path = _root() / data["path"] if data.get("path") else None
+    gen = Generation(int(data["generation"]), path, dict(data.get("tenants") or {}))
+    _cached = (stamp, gen)
+    return gen
+
+
+@contextmanager
+def _publish_lock(timeout_s: float = 30.0):
+    # O_EXCL lock file: portable (Windows included) and enough for the rare publisher
+    lock = _root() / (CURRENT_FILE + ".lock")
+    deadline = time.monotonic() + timeout_s
+    while True:
+        try:
+            fd = os.open(str(lock), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for index publish lock {lock}")
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.unlink(str(lock))
+
+
+def _write_current(number: int, rel_path: Optional[str], tenants: Dict[str, int]) -> Generation:
+    root = _root()
+    tmp = root / f"{CURRENT_FILE}.{uuid.uuid4().hex}.tmp"
+    tmp.write_text(json.dumps({"generation": number, "path": rel_path, "tenants": tenants}), encoding="utf-8")
+    os.replace(tmp, root / CURRENT_FILE)
+    return Generation(number, root / rel_path if rel_path else None, tenants)
+
+
+def bump_generation(tenant: Optional[str] = None) -> Generation:
+    """
+    Record a write to the Chroma index without changing the published snapshot, so caches
+    stamped with the old version stop matching. With `tenant`, only that tenant's counter
+    moves and other tenants' caches stay warm; without, every tenant is invalidated.
+    """
+    root = _root()
+    root.mkdir(parents=True, exist_ok=True)
+    with _publish_lock():
+        current = read_current()
+        rel_path = current.path.relative_to(root).as_posix() if current.path else None
+        if tenant is None:
+            return _write_current(current.number + 1, rel_path, current.tenants)
+        tenants = {**current.tenants, tenant: current.tenants.get(tenant, 0) + 1}
+        return _write_current(current.number, rel_path, tenants)
+
+
+def new_generation_dir() -> Path:
+    """Directory to build the next snapshot in; it is not visible to workers until published."""
+    path = _root() / GENERATIONS_DIR / f"building-{uuid.uuid4().hex}"
+    path.mkdir(parents=True, exist_ok=False)
+    return path
+
+
+def publish(snapshot_dir: Path, keep: int = 2) -> Generation:
+    """
+    Atomically make `snapshot_dir` (from new_generation_dir) the current generation.
+    Workers pick it up on their next request. Keeps the newest `keep` generations on disk
+    so in-flight requests on the previous one can finish.
+    """
+    root = _root()
+    root.mkdir(parents=True, exist_ok=True)
+    with _publish_lock():
+        current = read_current()
+        number = current.number + 1
+        final = root / GENERATIONS_DIR / f"gen-{number:06d}"
+        os.replace(snapshot_dir, final)
+        gen = _write_current(number, f"{GENERATIONS_DIR}/{final.name}", current.tenants)
+    _prune(keep)
+    return gen
+
+
+def _prune(keep: int) -> None:
+    gens = sorted((_root() / GENERATIONS_DIR).glob("gen-*"), key=lambda p: p.name)
+    for old in gens[:-keep] if keep > 0 else []:
+        # Workers that still map an old generation keep their open files on POSIX; on
+        # Windows the delete fails while mapped and is retried on the next publish
+        shutil.rmtree(old, ignore_errors=True)
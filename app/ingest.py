@@ -1,22 +1,30 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import os
 import shutil
 import uuid
 from pathlib import Path
-from typing import Iterable, List, Tuple
+from typing import Iterable, List, Optional, Tuple
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import PyPDFLoader, TextLoader
 from langchain_core.documents import Document
 
 from .llm import get_embeddings
-from .vector_store import get_vector_store
+from .vector_store import get_chroma_store
 from .config import settings
+from .generation import bump_generation
+from .tenancy import resolve_tenant
+from .profiling import stage
 
 
 SUPPORTED_EXTS = {".pdf", ".txt"}
 
+# Bump to invalidate every cached parse (e.g. after changing how pages are post-processed)
+PARSE_CACHE_VERSION = 1
+
 
 def _loader_for(path: Path):
     if path.suffix.lower() == ".pdf":
@@ -24,11 +32,63 @@ def _loader_for(path: Path):
     return TextLoader(str(path), encoding="utf-8")
 
 
+def _loader_version(path: Path) -> str:
+    if path.suffix.lower() == ".pdf":
+        import pypdf
+
+        return f"pypdf-{pypdf.__version__}-v{PARSE_CACHE_VERSION}"
+    return f"text-v{PARSE_CACHE_VERSION}"
+
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _parse_cache_path(path: Path) -> Optional[Path]:
+    if not settings.parse_cache_dir:
+        return None
+    key = f"{_file_sha256(path)}-{_loader_version(path)}"
+    return Path(settings.parse_cache_dir) / f"{key}.json"
+
+
+def _read_parse_cache(cache_path: Optional[Path]) -> Optional[List[Document]]:
+    if cache_path is None or not cache_path.exists():
+        return None
+    try:
+        pages = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        # unreadable/corrupt entry: fall back to parsing the file again
+        return None
+    return [Document(page_content=p["page_content"], metadata=p["metadata"]) for p in pages]
+
+
+def _write_parse_cache(cache_path: Optional[Path], docs: List[Document]) -> None:
+    if cache_path is None:
+        return
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+    tmp.write_text(
+        json.dumps([{"page_content": d.page_content, "metadata": d.metadata} for d in docs], ensure_ascii=False),
+        encoding="utf-8",
+    )
+    # atomic rename so a concurrent ingest never reads a half-written entry
+    os.replace(tmp, cache_path)
+
+
 def _load_documents(paths: List[Path]) -> List[Document]:
     docs: List[Document] = []
     for p in paths:
-        loader = _loader_for(p)
-        loaded = loader.load()
+        # Parsed text is cached by file content hash + loader version, so re-chunking
+        # a corpus does not pay for PDF parsing again
+        cache_path = _parse_cache_path(p)
+        loaded = _read_parse_cache(cache_path)
+        if loaded is None:
+            loaded = _loader_for(p).load()
+            _write_parse_cache(cache_path, loaded)
         # add source metadata
         for d in loaded:
             d.metadata = {**d.metadata, "source": str(p)}
@@ -38,14 +98,16 @@ def _load_documents(paths: List[Path]) -> List[Document]:
 
 def _split_documents(docs: List[Document]) -> List[Document]:
     splitter = RecursiveCharacterTextSplitter(
-        chunk_size=800,
-        chunk_overlap=120,
+        chunk_size=settings.chunk_size,
+        chunk_overlap=settings.chunk_overlap,
         separators=["\n\n", "\n", " ", ""],
     )
     return splitter.split_documents(docs)
 
 
-def ingest_file_paths(file_paths: Iterable[str]) -> Tuple[int, int]:
+def ingest_file_paths(file_paths: Iterable[str], tenant: Optional[str] = None) -> Tuple[int, int]:
+    """Parse, chunk and embed files into `tenant`'s collection (default tenant if None)."""
+    tenant = resolve_tenant(tenant)
     paths = [Path(p) for p in file_paths]
     for p in paths:
         if not p.exists():
@@ -53,13 +115,20 @@ def ingest_file_paths(file_paths: Iterable[str]) -> Tuple[int, int]:
         if p.suffix.lower() not in SUPPORTED_EXTS:
             raise ValueError(f"Unsupported file type: {p.suffix}")
 
-    docs = _load_documents(paths)
-    chunks = _split_documents(docs)
-
-    embeddings = get_embeddings()
-    vs = get_vector_store(embeddings)
-    vs.add_documents(chunks)
-    vs.persist()
+    # stage() only records anything under a StageProfiler (ingest_from_uploads.py --profile)
+    with stage("load"):
+        docs = _load_documents(paths)
+    with stage("split"):
+        chunks = _split_documents(docs)
+
+    embeddings = get_embeddings(cached=False)
+    vs = get_chroma_store(embeddings, tenant=tenant)
+    with stage("embed_and_store"):
+        vs.add_documents(chunks)
+    with stage("persist"):
+        vs.persist()
+    # New index contents: invalidate this tenant's generation-stamped caches (retrieval results)
+    bump_generation(tenant)
 
     return len(docs), len(chunks)
 
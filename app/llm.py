@@ -1,12 +1,18 @@
 from __future__ import annotations
 
 import os
-from typing import Optional
-
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+from typing import TYPE_CHECKING, List
 
 from .config import settings
 
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+
+    from .resilient_models import ResilientChatModel
+
+# langchain_google_genai (and the google-genai client under it) is imported inside the
+# factories below so that importing the app stays fast; the first call pays the cost.
+
 
 def _ensure_key():
     # Ensure GOOGLE_API_KEY set for client
@@ -17,16 +23,68 @@ def _ensure_key():
         )
 
 
-def get_chat_model(temperature: float = 0.2) -> ChatGoogleGenerativeAI:
+def _provider_chat_model(model: str, temperature: float):
+    if settings.llm_provider == "fake":
+        from .fake_provider import FakeChatModel
+
+        return FakeChatModel(model=model)
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
     _ensure_key()
     return ChatGoogleGenerativeAI(
-        model=settings.llm_model,
+        model=model,
         temperature=temperature,
     )
 
 
-def get_embeddings() -> GoogleGenerativeAIEmbeddings:
-    _ensure_key()
-    return GoogleGenerativeAIEmbeddings(
-        model=settings.embedding_model
-    )
+def get_chat_model(temperature: float = 0.2) -> ResilientChatModel:
+    """
+    Chat model for settings.llm_model, wrapped with deadlines and a circuit breaker
+    (see app/resilient_models.py). Exposes invoke()/ainvoke() like the LangChain model.
+    """
+    from .resilient_models import ResilientChatModel
+
+    primary = _provider_chat_model(settings.llm_model, temperature)
+    fallback = None
+    if settings.llm_fallback_model and settings.llm_fallback_model != settings.llm_model:
+        fallback = _provider_chat_model(settings.llm_fallback_model, temperature)
+    return ResilientChatModel(primary, fallback, model=settings.llm_model, fallback_model=settings.llm_fallback_model or None)
+
+
+def get_embeddings(cached: bool = True) -> Embeddings:
+    """
+    Query/document embeddings for settings.embedding_model. Query calls are hedged, bounded
+    and circuit-broken; with `cached`, they also go through the cache tier (app/cache.py).
+    """
+    from .resilient_models import ResilientEmbeddings
+
+    if settings.llm_provider == "fake":
+        from .fake_provider import FakeEmbeddings
+
+        embeddings = FakeEmbeddings()
+    else:
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+        _ensure_key()
+        embeddings = GoogleGenerativeAIEmbeddings(
+            model=settings.embedding_model
+        )
+    embeddings = ResilientEmbeddings(embeddings, settings.embedding_model)
+    if not cached:
+        return embeddings
+    from .embedding_cache import CachedQueryEmbeddings
+
+    return CachedQueryEmbeddings(embeddings, settings.embedding_model)
+
+
+def embed_queries(embeddings, texts: List[str]) -> List[List[float]]:
+    """Embed several search queries with as few provider round trips as possible."""
+    if hasattr(embeddings, "embed_queries"):
+        return embeddings.embed_queries(texts)
+    if settings.llm_provider == "google":
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+        if isinstance(embeddings, GoogleGenerativeAIEmbeddings):
+            # embed_documents batches up to 100 texts per request; keep the query task type
+            return embeddings.embed_documents(texts, task_type="RETRIEVAL_QUERY")
+    return [embeddings.embed_query(t) for t in texts]
@@ -1,18 +1,76 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from .config import settings
 from .routes import chat as chat_routes
 from .routes import ingest as ingest_routes
 from .routes import chats as chats_routes
+from . import metrics, warmup
+from .resilience import CircuitOpenError, DeadlineExceeded
+from .admission import AdmissionRejected
 
-app = FastAPI(title="RAG Chatbot (LangChain + Gemini)")
+logger = logging.getLogger(__name__)
+
+
+async def _ensure_db_indexes() -> None:
+    from .db import MONGODB_URI, ensure_indexes
+
+    if not MONGODB_URI:
+        return
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        # non-fatal: queries still work without the indexes, just slower
+        logger.warning("Could not create MongoDB indexes: %s", e)
+
+
+async def _prewarm_caches(warmup_task) -> None:
+    from .db import MONGODB_URI
+
+    if warmup_task is not None:
+        await warmup_task
+    if not MONGODB_URI:
+        return
+    from .prewarm import format_report, prewarm
+
+    try:
+        logger.info("%s", format_report(await prewarm()))
+    except Exception as e:
+        # non-fatal: requests just start with cold caches
+        logger.warning("Cache pre-warm failed: %s", e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background: an unreachable Mongo must not hold up start-up (server selection can take 30s)
+    index_task = asyncio.create_task(_ensure_db_indexes())
+    # Warm up in the background so /health answers immediately; /ready flips once done
+    task = None
+    if settings.warmup_on_startup:
+        task = asyncio.create_task(warmup.warm_up_until_ready())
+    else:
+        warmup.state.set("skipped")
+    # Then load popular questions into the caches; readiness does not wait for it
+    prewarm_task = None
+    if settings.prewarm_on_startup:
+        prewarm_task = asyncio.create_task(_prewarm_caches(task))
+    yield
+    for t in (prewarm_task, task, index_task):
+        if t is not None and not t.done():
+            t.cancel()
+
+
+app = FastAPI(title="RAG Chatbot (LangChain + Gemini)", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -23,17 +81,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+
+@app.exception_handler(CircuitOpenError)
+async def circuit_open_handler(request: Request, exc: CircuitOpenError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, int(exc.retry_after + 0.5)))},
+    )
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 # Routers
 app.include_router(ingest_routes.router)
 app.include_router(chat_routes.router)
 app.include_router(chats_routes.router)
+if settings.profiling_enabled:
+    from .routes import admin as admin_routes
+
+    app.include_router(admin_routes.router)
 
 
 @app.get("/health")
 async def health():
+    """Liveness: the process is up and serving HTTP. Does not touch any dependency."""
     return {"status": "ok"}
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness: 200 once startup warm-up has opened the vector store and run a query."""
+    body = warmup.state.as_dict()
+    return JSONResponse(status_code=200 if warmup.state.ready else 503, content=body)
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """In-process counters/gauges: hedges fired/won, breaker state, deadline overruns, ..."""
+    return metrics.snapshot()
+
+
 # Serve frontend (React build or fallback to simple frontend)
 REACT_DIST_DIR = Path(__file__).resolve().parent.parent / "frontend-react" / "dist"
 SIMPLE_FRONTEND_DIR = Path(__file__).resolve().parent.parent / "frontend"
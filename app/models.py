@@ -22,3 +22,19 @@ class SourceItem(BaseModel):
 class ChatResponse(BaseModel):
     answer: str
     sources: List[SourceItem] = []
+
+
+class BatchChatRequest(BaseModel):
+    questions: List[str] = Field(min_length=1)
+    top_k: int = Field(default=4, ge=1, le=20)
+    temperature: float = Field(default=0.2, ge=0.0, le=1.0)
+    concurrency: Optional[int] = Field(default=None, ge=1, le=64)  # Defaults to settings.batch_max_concurrency
+
+
+class BatchChatResult(BaseModel):
+    index: int
+    question: str
+    answer: Optional[str] = None
+    sources: List[SourceItem] = []
+    error: Optional[str] = None
+    model: Optional[str] = None  # model that generated the answer (differs while falling back)
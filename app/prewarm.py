@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from . import metrics
+from .answer_cache import answer_key, cacheable_model, get_answer, set_answer
+from .config import settings
+from .generation import read_current
+from .prompts import conversation_retrieval_query
+from .tenancy import resolve_tenant, tenant_filter
+
+
+# Report of the last prewarm() in this process (None until one has run)
+last_report: Optional[Dict[str, Any]] = None
+
+
+def rank_questions(counts: Counter, likes: Counter, limit: int) -> List[str]:
+    """Questions ordered by times asked + PREWARM_LIKE_WEIGHT * likes on their answers."""
+    scores = Counter()
+    for question, n in counts.items():
+        scores[question] += n
+    for question, n in likes.items():
+        scores[question] += settings.prewarm_like_weight * n
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [q for q, _ in ranked if q.strip()][:limit]
+
+
+async def tenants_with_history(db) -> List[str]:
+    tenants = set()
+    # Not distinct("tenant_id"): it skips documents without the field, i.e. all pre-tenancy history
+    pipeline = [
+        {"$match": {"role": "user"}},
+        {"$group": {"_id": {"$ifNull": ["$tenant_id", None]}}},
+    ]
+    async for row in db.messages.aggregate(pipeline):
+        try:
+            tenants.add(resolve_tenant(row["_id"]))  # None: messages from before tenancy
+        except ValueError:
+            continue
+    return sorted(tenants)
+
+
+async def mine_questions(db, tenant: str, limit: int) -> List[str]:
+    """
+    The tenant's most valuable questions to warm: the most frequently asked among the last
+    PREWARM_SCAN_MESSAGES user messages, boosted by likes on the answers they got.
+    """
+    tf = tenant_filter(tenant)
+    counts: Counter = Counter()
+    pipeline = [
+        {"$match": {**tf, "role": "user"}},
+        {"$sort": {"created_at": -1}},
+        {"$limit": settings.prewarm_scan_messages},
+        {"$group": {"_id": "$content", "count": {"$sum": 1}}},
+    ]
+    async for row in db.messages.aggregate(pipeline):
+        if isinstance(row["_id"], str):
+            counts[row["_id"]] = row["count"]
+
+    # A liked answer credits the user message just before it in the same chat; one round trip,
+    # the per-answer lookup runs server-side on the (tenant_id, chat_id, created_at) index
+    likes: Counter = Counter()
+    liked_pipeline = [
+        {"$match": {**tf, "role": "assistant", "feedback": "like"}},
+        {"$sort": {"feedback_at": -1}},
+        {"$limit": limit},
+        {
+            "$lookup": {
+                "from": "messages",
+                "let": {"chat_id": "$chat_id", "answered_at": "$created_at"},
+                "pipeline": [
+                    {"$match": {**tf, "role": "user"}},
+                    {"$match": {"$expr": {"$and": [
+                        {"$eq": ["$chat_id", "$$chat_id"]},
+                        {"$lte": ["$created_at", "$$answered_at"]},
+                    ]}}},
+                    {"$sort": {"created_at": -1}},
+                    {"$limit": 1},
+                    {"$project": {"content": 1}},
+                ],
+                "as": "question",
+            }
+        },
+        {"$unwind": "$question"},
+        {"$group": {"_id": "$question.content", "likes": {"$sum": 1}}},
+    ]
+    async for row in db.messages.aggregate(liked_pipeline):
+        if isinstance(row["_id"], str):
+            likes[row["_id"]] = row["likes"]
+    return rank_questions(counts, likes, limit)
+
+
+def _warm_retrieval(tenant: str, questions: List[str], top_k: int) -> Dict[str, int]:
+    from .llm import get_embeddings
+    from .retrieval import warm
+    from .vector_store import get_vector_store
+
+    embeddings = get_embeddings()
+    vs = get_vector_store(embeddings, tenant=tenant)
+    # /chat retrieves on the question itself, /chats/{id}/messages (first turn) on the
+    # conversation query built from it; warm both so either endpoint hits the cache
+    chat_queries = [conversation_retrieval_query([{"role": "user", "content": q}], q) for q in questions]
+    texts = list(dict.fromkeys(questions + chat_queries))
+    cold = [t for t in texts if not embeddings.is_cached(t)]
+    if cold:
+        # sent in QUERY_BATCH slices by ResilientEmbeddings
+        embeddings.embed_queries(cold)
+    warmed = warm(vs, questions, k=top_k, tenant=tenant) + warm(vs, chat_queries, k=top_k, tenant=tenant)
+    return {"embeddings": len(cold), "retrieval": warmed}
+
+
+async def _warm_answers(tenant: str, questions: List[str], top_k: int) -> int:
+    from .batch import answer_questions
+    from .models import ChatRequest
+
+    temperature = ChatRequest.model_fields["temperature"].default
+    keys = {q: answer_key(q, top_k, temperature, tenant) for q in questions}
+    cold = [q for q in questions if get_answer(keys[q]) is None]
+    warmed = 0
+    if cold:
+        async for result in answer_questions(cold, top_k=top_k, temperature=temperature, tenant=tenant):
+            if result.error is None and cacheable_model(result.model):
+                set_answer(keys[result.question], {"answer": result.answer, "sources": [s.model_dump() for s in result.sources]})
+                warmed += 1
+    return warmed
+
+
+async def warm_tenant(tenant: str, questions: List[str], top_k: int = 4, answers: bool = False) -> Dict[str, Any]:
+    """Precompute query embeddings, retrieval results and optionally /chat answers for `questions`."""
+    started = time.perf_counter()
+    report: Dict[str, Any] = {"questions": len(questions), "embeddings": 0, "retrieval": 0, "answers": 0}
+    if questions:
+        report.update(await asyncio.to_thread(_warm_retrieval, tenant, questions, top_k))
+        if answers:
+            report["answers"] = await _warm_answers(tenant, questions, top_k)
+    number, tenant_writes = read_current().stamp(tenant)
+    # Caches are keyed by both: the published generation and this tenant's write counter
+    report["generation"] = {"number": number, "tenant_writes": tenant_writes}
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+async def prewarm(
+    tenants: Optional[List[str]] = None,
+    max_questions: Optional[int] = None,
+    answers: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """
+    Mine chat history for each tenant (all tenants with history by default) and load the
+    serving caches for the current index generation. Entries already cached are skipped, so
+    with CACHE_BACKEND=sqlite only the first worker to start does the work. Answers are
+    warmed only when the answer cache is enabled unless `answers` says otherwise.
+    """
+    global last_report
+    from .db import get_db
+
+    started = time.perf_counter()
+    db = get_db()
+    limit = max_questions or settings.prewarm_max_questions
+    answers = settings.answer_cache_enabled if answers is None else answers
+    tenants = [resolve_tenant(t) for t in tenants] if tenants else await tenants_with_history(db)
+
+    per_tenant: Dict[str, Dict[str, Any]] = {}
+    for tenant in tenants:
+        questions = await mine_questions(db, tenant, limit)
+        per_tenant[tenant] = await warm_tenant(tenant, questions, answers=answers)
+
+    totals = {kind: sum(t[kind] for t in per_tenant.values()) for kind in ("questions", "embeddings", "retrieval", "answers")}
+    report = {"tenants": per_tenant, **totals, "seconds": round(time.perf_counter() - started, 3)}
+    for kind in ("embeddings", "retrieval", "answers"):
+        metrics.set_gauge("prewarm_entries", totals[kind], kind=kind)
+    metrics.set_gauge("prewarm_seconds", report["seconds"])
+    last_report = report
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"Pre-warmed {len(report['tenants'])} tenant(s) in {report['seconds']:.2f}s: "
+        f"{report['embeddings']} embeddings, {report['retrieval']} retrieval results, "
+        f"{report['answers']} answers from {report['questions']} questions"
+    ]
+    for tenant, t in report["tenants"].items():
+        lines.append(
+            f"  {tenant} (generation {t['generation']['number']}, tenant writes {t['generation']['tenant_writes']}): {t['questions']} questions, {t['embeddings']} embeddings, "
+            f"{t['retrieval']} retrieval, {t['answers']} answers in {t['seconds']:.2f}s"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import io
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+# Everything here is opt-in. With no StageProfiler active, stage() costs one ContextVar lookup,
+# and the worker-level captures below only run when an admin endpoint asks for them.
+
+
+# ---------------------------------------------------------------------------
+# Per-stage reports (ingestion)
+# ---------------------------------------------------------------------------
+
+_active: contextvars.ContextVar[Optional["StageProfiler"]] = contextvars.ContextVar("stage_profiler", default=None)
+
+
+class StageProfiler:
+    """
+    Records wall time, CPU time and peak traced memory for each stage() run inside
+    `with StageProfiler():`, plus a cProfile of each top-level stage when `cprofile` is set.
+    tracemalloc is started for the duration if it is not already tracing.
+    """
+
+    def __init__(self, cprofile: bool = True) -> None:
+        self.cprofile = cprofile
+        self.stages: List[Dict[str, Any]] = []
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self._depth = 0
+        # Per open stage: highest peak seen before a nested stage's reset_peak() discarded it
+        self._carried_peaks: List[int] = []
+        self._started_tracing = False
+        self._token: Optional[contextvars.Token] = None
+
+    def __enter__(self) -> "StageProfiler":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._token = _active.set(self)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        _active.reset(self._token)
+        if self._started_tracing:
+            tracemalloc.stop()
+
+    @contextmanager
+    def _measure(self, name: str):
+        # cProfile cannot nest, so only the outermost stage gets a call profile
+        profile = cProfile.Profile() if self.cprofile and self._depth == 0 else None
+        traced_before, peak_so_far = tracemalloc.get_traced_memory()
+        if self._carried_peaks:
+            self._carried_peaks[-1] = max(self._carried_peaks[-1], peak_so_far)
+        tracemalloc.reset_peak()
+        self._carried_peaks.append(0)
+        wall, cpu = time.perf_counter(), time.process_time()
+        self._depth += 1
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            self._depth -= 1
+            traced_after, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self._carried_peaks.pop())
+            self.stages.append(
+                {
+                    "stage": name,
+                    "depth": self._depth,
+                    "wall_seconds": round(time.perf_counter() - wall, 4),
+                    "cpu_seconds": round(time.process_time() - cpu, 4),
+                    "peak_traced_mb": round(peak / 2**20, 2),
+                    "retained_mb": round((traced_after - traced_before) / 2**20, 2),
+                }
+            )
+            if profile is not None:
+                self.profiles[name] = profile
+
+    def table(self) -> str:
+        lines = [f"{'stage':<24} {'wall s':>9} {'cpu s':>9} {'peak MB':>9} {'retained MB':>12}"]
+        for s in self.stages:
+            label = "  " * s["depth"] + s["stage"]
+            lines.append(
+                f"{label:<24} {s['wall_seconds']:>9.3f} {s['cpu_seconds']:>9.3f} "
+                f"{s['peak_traced_mb']:>9.2f} {s['retained_mb']:>12.2f}"
+            )
+        return "\n".join(lines)
+
+    def summary(self, top: int = 15) -> str:
+        lines = [self.table()]
+        for name, profile in self.profiles.items():
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(top)
+            lines += ["", f"== {name}: top {top} by cumulative time ==", out.getvalue().strip()]
+        return "\n".join(lines) + "\n"
+
+    def write(self, out_dir: Path) -> Path:
+        """Write stages.json, summary.txt and one <stage>.prof (for pstats/snakeviz) per profile."""
+        out_dir.mkdir(parents=True, exist_ok=True)
+        (out_dir / "stages.json").write_text(json.dumps(self.stages, indent=2), encoding="utf-8")
+        (out_dir / "summary.txt").write_text(self.summary(), encoding="utf-8")
+        for name, profile in self.profiles.items():
+            profile.dump_stats(str(out_dir / f"{name}.prof"))
+        return out_dir
+
+
+@contextmanager
+def stage(name: str):
+    """Mark a named stage for the active StageProfiler; a no-op when none is active."""
+    profiler = _active.get()
+    if profiler is None:
+        yield
+        return
+    with profiler._measure(name):
+        yield
+
+
+# ---------------------------------------------------------------------------
+# Worker captures (admin endpoints)
+# ---------------------------------------------------------------------------
+
+# One capture at a time per process: cProfile and tracemalloc are process-global
+_capture_lock = threading.Lock()
+
+
+class CaptureBusy(RuntimeError):
+    """Another profile or memory capture is already running in this worker."""
+
+
+@contextmanager
+def _exclusive():
+    if not _capture_lock.acquire(blocking=False):
+        raise CaptureBusy("A profiling capture is already running in this worker")
+    try:
+        yield
+    finally:
+        _capture_lock.release()
+
+
+def _frame_stack(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> str:
+    """
+    Sample every thread's stack for `seconds` and return collapsed stacks ("a;b;c count"
+    per line, input for flamegraph.pl / speedscope). Blocking: run it off the event loop.
+    """
+    with _exclusive():
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        counts: Counter = Counter()
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            for ident, frame in sys._current_frames().items():
+                if ident != me:
+                    counts[f"{names.get(ident, ident)};{_frame_stack(frame)}"] += 1
+            time.sleep(interval)
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
+
+
+@contextmanager
+def cprofile_capture(top: int = 40):
+    """
+    cProfile the calling thread while the block runs; yields a dict whose "report" key is
+    filled with pstats text on exit. Used from the event loop thread, so it sees every
+    coroutine the loop runs in that window (not work handed to thread pools).
+    """
+    result: Dict[str, str] = {}
+    with _exclusive():
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield result
+        finally:
+            profile.disable()
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(top)
+            result["report"] = out.getvalue()
+
+
+@contextmanager
+def tracemalloc_capture(top: int = 25, frames: int = 10):
+    """
+    Trace allocations while the block runs; yields a dict filled on exit with the largest
+    live allocation sites. If tracemalloc was already on (PYTHONTRACEMALLOC), the report
+    covers everything traced so far rather than just this window.
+    """
+    result: Dict[str, Any] = {}
+    with _exclusive():
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(frames)
+        try:
+            yield result
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if started:
+                tracemalloc.stop()
+            snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+            result.update(
+                traced_mb=round(current / 2**20, 2),
+                peak_mb=round(peak / 2**20, 2),
+                top=[
+                    {
+                        "size_kb": round(s.size / 1024, 1),
+                        "count": s.count,
+                        "traceback": [f"{f.filename}:{f.lineno}" for f in s.traceback],
+                    }
+                    for s in snapshot.statistics("traceback")[:top]
+                ],
+            )
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+from .models import SourceItem
+
+
+SYSTEM_INSTRUCTION = (
+    "You are a helpful assistant. Answer the user's question using the provided context. "
+    "If the answer isn't in the context, say you don't know. Keep answers concise and cite sources when possible."
+)
+
+
+def format_context(docs) -> str:
+    blocks = []
+    for i, d in enumerate(docs, start=1):
+        src = d.metadata.get("source") if hasattr(d, "metadata") else None
+        blocks.append(f"[Source {i}: {src}]\n{d.page_content}")
+    return "\n\n".join(blocks)
+
+
+def build_qa_prompt(question: str, docs) -> str:
+    context = format_context(docs)
+    return (
+        f"{SYSTEM_INSTRUCTION}\n\n"
+        f"Context:\n{context}\n\n"
+        f"Question: {question}\n"
+        f"Answer:"
+    )
+
+
+def conversation_retrieval_query(recent: List[Dict], question: str) -> str:
+    """
+    Retrieval query for a chat message: the last 3 user and last 2 assistant messages of
+    `recent` (oldest first, already including the new user message) plus the question.
+    """
+    last_user_msgs = [m.get("content") for m in recent if m.get("role") == "user"]
+    last_assistant_msgs = [m.get("content") for m in recent if m.get("role") == "assistant"]
+    parts = []
+    if last_user_msgs:
+        parts.append(" ".join(last_user_msgs[-3:]))
+    if last_assistant_msgs:
+        parts.append(" ".join(last_assistant_msgs[-2:]))
+    parts.append(question)
+    return " ".join(parts)
+
+
+def to_source_items(docs) -> List[SourceItem]:
+    sources: List[SourceItem] = []
+    for i, d in enumerate(docs, start=1):
+        sources.append(
+            SourceItem(
+                id=str(i),
+                score=d.metadata.get("score") if hasattr(d, "metadata") else None,
+                source=d.metadata.get("source") if hasattr(d, "metadata") else None,
+                content=d.page_content,
+            )
+        )
+    return sources
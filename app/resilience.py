@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+from . import metrics
+from .config import settings
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline ran out (or a single provider call hit its timeout).
+
+    `provider_timeout` is True only when the call's own timeout was the binding limit, i.e.
+    the provider was slow; running out of request budget spent elsewhere is not its fault.
+    """
+
+    def __init__(self, stage: str, provider_timeout: bool = False) -> None:
+        super().__init__(f"Deadline exceeded during {stage}")
+        self.stage = stage
+        self.provider_timeout = provider_timeout
+
+
+class CircuitOpenError(RuntimeError):
+    """The provider is marked degraded; the call was rejected without being attempted."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"{name} is temporarily unavailable (circuit open)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+# ---------------------------------------------------------------------------
+# Deadlines
+# ---------------------------------------------------------------------------
+
+# Absolute time.monotonic() by which the current request must finish. A ContextVar so it
+# follows the request through awaits, asyncio.to_thread and run_in_context below.
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """Bound everything inside to `seconds` from now (never extends an outer deadline)."""
+    if not seconds or seconds <= 0:
+        yield
+        return
+    new = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(new if outer is None else min(outer, new))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None when no deadline is set."""
+    d = _deadline.get()
+    return None if d is None else d - time.monotonic()
+
+
+def check_deadline(stage: str) -> None:
+    left = remaining()
+    if left is not None and left <= 0:
+        metrics.incr("deadline_exceeded", stage=stage)
+        raise DeadlineExceeded(stage)
+
+
+def timeout_for(call_timeout: Optional[float]) -> Optional[float]:
+    """Effective timeout for one call: the smaller of its own timeout and the request deadline."""
+    left = remaining()
+    candidates = [t for t in (call_timeout, left) if t is not None]
+    return max(min(candidates), 0.0) if candidates else None
+
+
+def _bound_by_call_timeout(call_timeout: Optional[float]) -> bool:
+    left = remaining()
+    return call_timeout is not None and (left is None or left >= call_timeout)
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.provider_max_threads, thread_name_prefix="provider")
+    return _executor
+
+
+def submit(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """Run a blocking provider call on the shared pool, carrying the caller's context (deadline)."""
+    ctx = contextvars.copy_context()
+    return _pool().submit(ctx.run, fn, *args, **kwargs)
+
+
+def call_with_timeout(fn: Callable[..., Any], *args: Any, stage: str, call_timeout: Optional[float], **kwargs: Any) -> Any:
+    """
+    Run `fn` but give up after timeout_for(call_timeout). A call that overruns keeps its pool
+    thread until the provider returns, but the caller stops waiting for it. The caller's own
+    thread blocks meanwhile: from async code, run it via asyncio.to_thread or use
+    acall_with_timeout, never directly on the event loop.
+    """
+    check_deadline(stage)
+    timeout = timeout_for(call_timeout)
+    if timeout is None:
+        return fn(*args, **kwargs)
+    provider_timeout = _bound_by_call_timeout(call_timeout)
+    future = submit(fn, *args, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        future.cancel()
+        metrics.incr("deadline_exceeded", stage=stage)
+        raise DeadlineExceeded(stage, provider_timeout)
+
+
+async def acall_with_timeout(coro_fn: Callable[..., Any], *args: Any, stage: str, call_timeout: Optional[float], **kwargs: Any) -> Any:
+    check_deadline(stage)
+    timeout = timeout_for(call_timeout)
+    provider_timeout = _bound_by_call_timeout(call_timeout)
+    try:
+        return await asyncio.wait_for(coro_fn(*args, **kwargs), timeout=timeout)
+    except asyncio.TimeoutError:
+        metrics.incr("deadline_exceeded", stage=stage)
+        raise DeadlineExceeded(stage, provider_timeout)
+
+
+# ---------------------------------------------------------------------------
+# Circuit breaker
+# ---------------------------------------------------------------------------
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures; open rejects calls for
+    `reset_seconds`, then half_open lets one trial call through: success closes, failure reopens.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        metrics.set_gauge("breaker_state", self._state, name=name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half_open"
+            return self._state
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        metrics.set_gauge("breaker_state", state, name=self.name)
+
+    def allow(self) -> None:
+        """Raise CircuitOpenError if the call must not be attempted right now."""
+        with self._lock:
+            if self._state == "closed":
+                return
+            elapsed = time.monotonic() - self._opened_at
+            if self._state == "open" and elapsed < self.reset_seconds:
+                raise CircuitOpenError(self.name, self.reset_seconds - elapsed)
+            if self._trial_in_flight:
+                raise CircuitOpenError(self.name, 1.0)
+            self._set_state("half_open")
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            if self._state != "closed":
+                self._set_state("closed")
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            reopen = self._state == "half_open"
+            self._trial_in_flight = False
+            if reopen or (self._state == "closed" and self._failures >= self.failure_threshold):
+                self._set_state("open")
+                self._opened_at = time.monotonic()
+                metrics.incr("breaker_opened", name=self.name)
+
+    def record_inconclusive(self) -> None:
+        """The call ended for a reason that says nothing about the provider: free a half-open trial."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_exception(self, exc: BaseException) -> None:
+        """Count `exc` against the provider unless it is the request running out of budget."""
+        if isinstance(exc, DeadlineExceeded) and not exc.provider_timeout:
+            self.record_inconclusive()
+        else:
+            self.record_failure()
+
+    def call(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        self.allow()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record_exception(e)
+            raise
+        self.record_success()
+        return result
+
+
+_breakers: dict = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, settings.breaker_failure_threshold, settings.breaker_reset_seconds)
+        return _breakers[name]
+
+
+# ---------------------------------------------------------------------------
+# Hedged requests
+# ---------------------------------------------------------------------------
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies (seconds)."""
+
+    def __init__(self, window: int = 200) -> None:
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float, min_samples: int) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < max(min_samples, 1):
+                return None
+            ordered = sorted(self._samples)
+        idx = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+        return ordered[idx]
+
+
+def hedged_call(
+    fn: Callable[..., Any],
+    *args: Any,
+    tracker: LatencyTracker,
+    name: str,
+    stage: str,
+    call_timeout: Optional[float],
+    **kwargs: Any,
+) -> Any:
+    """
+    Call `fn`; if it has not returned by the tracked latency percentile, fire one duplicate
+    and return whichever finishes first. Until enough samples exist this is a plain timed call.
+    """
+    check_deadline(stage)
+    timeout = timeout_for(call_timeout)
+    provider_timeout = _bound_by_call_timeout(call_timeout)
+    hedge_after = tracker.percentile(settings.hedge_percentile, settings.hedge_min_samples)
+    started = time.monotonic()
+    primary = submit(fn, *args, **kwargs)
+    pending = {primary}
+
+    if hedge_after is not None and (timeout is None or hedge_after < timeout):
+        done, _ = wait(pending, timeout=hedge_after)
+        if not done:
+            metrics.incr("hedges_fired", name=name)
+            pending.add(submit(fn, *args, **kwargs))
+
+    error: Optional[BaseException] = None
+    while pending:
+        left = None if timeout is None else timeout - (time.monotonic() - started)
+        if left is not None and left <= 0:
+            break
+        done, pending = wait(pending, timeout=left, return_when=FIRST_COMPLETED)
+        for f in done:
+            if f.exception() is None:
+                if f is not primary:
+                    metrics.incr("hedges_won", name=name)
+                tracker.record(time.monotonic() - started)
+                for other in pending:
+                    other.cancel()
+                return f.result()
+            error = f.exception()
+    for f in pending:
+        f.cancel()
+    if error is not None and not pending:
+        raise error
+    metrics.incr("deadline_exceeded", stage=stage)
+    raise DeadlineExceeded(stage, provider_timeout)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from typing import Any, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from . import metrics
+from .config import settings
+from .resilience import (
+    CircuitOpenError,
+    LatencyTracker,
+    acall_with_timeout,
+    call_with_timeout,
+    check_deadline,
+    get_breaker,
+    hedged_call,
+)
+
+
+class ResilientChatModel:
+    """
+    Chat model wrapper used by every call site via get_chat_model(): each call is bounded by
+    the request deadline and LLM_TIMEOUT_SECONDS, and failures feed a circuit breaker. While
+    the breaker is open calls go to `fallback` if configured, otherwise fail fast.
+    """
+
+    def __init__(
+        self,
+        primary: Any,
+        fallback: Optional[Any] = None,
+        model: Optional[str] = None,
+        fallback_model: Optional[str] = None,
+    ) -> None:
+        self.primary = primary
+        self.fallback = fallback
+        # Configured names (provider clients may report them differently, e.g. "models/...")
+        self.model = model or getattr(primary, "model", "llm")
+        self.fallback_model = fallback_model or getattr(fallback, "model", "fallback")
+        self.breaker = get_breaker(f"llm:{self.model}")
+
+    def _use_fallback(self) -> bool:
+        try:
+            self.breaker.allow()
+            return False
+        except CircuitOpenError:
+            if self.fallback is None:
+                metrics.incr("breaker_rejected", name=self.breaker.name)
+                raise
+            metrics.incr("llm_fallback_used", model=self.fallback_model)
+            return True
+
+    def invoke_with_model(self, prompt: str) -> Tuple[Any, str]:
+        """invoke(), plus the name of the model that actually answered (primary or fallback)."""
+        # An exhausted request budget is not the provider's fault: fail before touching the breaker
+        check_deadline("generation")
+        if self._use_fallback():
+            result = call_with_timeout(self.fallback.invoke, prompt, stage="generation", call_timeout=settings.llm_timeout_seconds)
+            return result, self.fallback_model
+        try:
+            result = call_with_timeout(self.primary.invoke, prompt, stage="generation", call_timeout=settings.llm_timeout_seconds)
+        except Exception as e:
+            self.breaker.record_exception(e)
+            raise
+        self.breaker.record_success()
+        return result, self.model
+
+    async def ainvoke_with_model(self, prompt: str) -> Tuple[Any, str]:
+        check_deadline("generation")
+        if self._use_fallback():
+            result = await acall_with_timeout(self.fallback.ainvoke, prompt, stage="generation", call_timeout=settings.llm_timeout_seconds)
+            return result, self.fallback_model
+        try:
+            result = await acall_with_timeout(self.primary.ainvoke, prompt, stage="generation", call_timeout=settings.llm_timeout_seconds)
+        except Exception as e:
+            self.breaker.record_exception(e)
+            raise
+        self.breaker.record_success()
+        return result, self.model
+
+    def invoke(self, prompt: str) -> Any:
+        return self.invoke_with_model(prompt)[0]
+
+    async def ainvoke(self, prompt: str) -> Any:
+        return (await self.ainvoke_with_model(prompt))[0]
+
+
+# Shared across wrapper instances (get_embeddings() builds a new one per request).
+# Single-query latencies only: batch calls would skew the percentile and always look slow.
+_query_latency = LatencyTracker()
+
+# Texts per batched provider call. Each call gets its own EMBEDDING_TIMEOUT_SECONDS, so a large
+# batch is several bounded round trips instead of one that has to fit a single timeout.
+QUERY_BATCH = 64
+
+
+class ResilientEmbeddings(Embeddings):
+    """
+    Single query embeddings are hedged (a duplicate call fires once the first exceeds the
+    HEDGE_PERCENTILE latency of recent calls), including one-text batches from retrieval.
+    Query embeddings, single or batched, are bounded by the request deadline and
+    EMBEDDING_TIMEOUT_SECONDS per provider call and guarded by a circuit breaker.
+    Document embeddings are ingestion-only and pass straight through.
+    """
+
+    def __init__(self, inner: Embeddings, model: str) -> None:
+        self.inner = inner
+        self.model = model
+        self.breaker = get_breaker(f"embeddings:{model}")
+
+    def _guarded(self, call, fn, *args: Any, **kwargs: Any) -> Any:
+        check_deadline("embedding")
+        try:
+            self.breaker.allow()
+        except CircuitOpenError:
+            metrics.incr("breaker_rejected", name=self.breaker.name)
+            raise
+        try:
+            result = call(fn, *args, stage="embedding", call_timeout=settings.embedding_timeout_seconds, **kwargs)
+        except Exception as e:
+            self.breaker.record_exception(e)
+            raise
+        self.breaker.record_success()
+        return result
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._guarded(hedged_call, self.inner.embed_query, text, tracker=_query_latency, name=self.breaker.name)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        from .llm import embed_queries
+
+        if len(texts) == 1:
+            # The usual serving case: /chat and /chats retrieve one query at a time
+            return [self.embed_query(texts[0])]
+        # Not hedged: a batch is slower than any single query, so it would always be duplicated
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), QUERY_BATCH):
+            vectors += self._guarded(call_with_timeout, embed_queries, self.inner, texts[start : start + QUERY_BATCH])
+        return vectors
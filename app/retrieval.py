@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Tuple
+
+from .cache import get_cache, make_key
+from .generation import read_current
+from .llm import embed_queries
+from .tenancy import collection_for, resolve_tenant
+from .vector_store import fetch_by_ids, query_by_vectors
+
+
+NAMESPACE = "retrieval"
+
+RETRIEVAL_MODES = {"similarity"}
+
+
+def _cache_key(stamp: Tuple[int, int], collection: str, query: str, k: int, filters: Optional[Dict], mode: str) -> str:
+    # The generation stamp is part of the key: ingest bumps it, so stale entries simply stop matching
+    return make_key(stamp, collection, query, k, filters or {}, mode)
+
+
+def _from_cache(vs, key: str):
+    hit = get_cache().get(NAMESPACE, key)
+    if hit is None:
+        return None
+    docs = fetch_by_ids(vs, hit["ids"])
+    if len(docs) != len(hit["ids"]):
+        # Chunks disappeared without a generation bump (e.g. store rebuilt out of band)
+        return None
+    return list(zip(docs, hit["scores"]))
+
+
+def _to_cache(key: str, generation: Tuple[int, int], hits) -> None:
+    get_cache().set(
+        NAMESPACE,
+        key,
+        {"generation": list(generation), "ids": [d.id for d, _ in hits], "scores": [float(s) for _, s in hits]},
+    )
+
+
+def retrieve_many(
+    vs,
+    queries: List[str],
+    k: int = 4,
+    filters: Optional[Dict] = None,
+    mode: str = "similarity",
+    tenant: Optional[str] = None,
+):
+    """
+    Ranked (document, distance) hits for each query against `vs` (the store for `tenant`),
+    in input order.
+
+    Results are cached by (tenant collection, query, k, filters, mode) under the tenant's
+    current index generation. Hits
+    skip both the embedding call and the vector query; misses are embedded in one batch and
+    searched in one call.
+    """
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode: {mode!r}")
+    tenant = resolve_tenant(tenant)
+    generation = read_current().stamp(tenant)
+    collection = collection_for(tenant)
+    keys = [_cache_key(generation, collection, q, k, filters, mode) for q in queries]
+    results: List[Optional[List[Tuple]]] = [_from_cache(vs, key) for key in keys]
+
+    missing = [i for i, r in enumerate(results) if r is None]
+    if missing:
+        vectors = embed_queries(vs.embeddings, [queries[i] for i in missing])
+        for i, hits in zip(missing, query_by_vectors(vs, vectors, k=k, where=filters or None)):
+            results[i] = hits
+            _to_cache(keys[i], generation, hits)
+    return results
+
+
+def retrieve(
+    vs,
+    query: str,
+    k: int = 4,
+    filters: Optional[Dict] = None,
+    mode: str = "similarity",
+    tenant: Optional[str] = None,
+):
+    """Cached equivalent of vs.similarity_search_with_score(query, k, filter=filters)."""
+    return retrieve_many(vs, [query], k=k, filters=filters, mode=mode, tenant=tenant)[0]
+
+
+def warm(
+    vs,
+    queries: List[str],
+    k: int = 4,
+    filters: Optional[Dict] = None,
+    mode: str = "similarity",
+    tenant: Optional[str] = None,
+) -> int:
+    """Fill the retrieval cache for `queries` under the current generation; returns how many were cold."""
+    tenant = resolve_tenant(tenant)
+    generation = read_current().stamp(tenant)
+    collection = collection_for(tenant)
+    cache = get_cache()
+    cold = [
+        q for q in dict.fromkeys(queries)
+        if cache.get(NAMESPACE, _cache_key(generation, collection, q, k, filters, mode)) is None
+    ]
+    if cold:
+        retrieve_many(vs, cold, k=k, filters=filters, mode=mode, tenant=tenant)
+    return len(cold)
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import asyncio
+import secrets
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from ..config import settings
+from ..profiling import CaptureBusy, cprofile_capture, sample_stacks, tracemalloc_capture
+
+
+def _require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    if not settings.admin_token or not x_admin_token or not secrets.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Admin-Token")
+
+
+# Only mounted by app.main when PROFILING_ENABLED=true
+router = APIRouter(prefix="/admin/profile", tags=["admin"], dependencies=[Depends(_require_admin)])
+
+
+def _window(seconds: float) -> float:
+    return min(seconds, settings.profiling_max_seconds)
+
+
+@router.get("/cpu", response_class=PlainTextResponse)
+async def profile_cpu(
+    seconds: float = Query(default=10.0, gt=0),
+    mode: Literal["sampling", "cprofile"] = "sampling",
+    interval_ms: float = Query(default=5.0, ge=1),
+) -> str:
+    """
+    Profile this worker for `seconds` while it serves traffic.
+
+    - sampling: collapsed stacks of every thread (flamegraph/speedscope input); low overhead
+    - cprofile: deterministic call stats for the event loop thread; slows the worker while it runs
+    """
+    try:
+        if mode == "sampling":
+            return await asyncio.to_thread(sample_stacks, _window(seconds), interval_ms / 1000)
+        with cprofile_capture() as result:
+            await asyncio.sleep(_window(seconds))
+        return result["report"]
+    except CaptureBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/memory")
+async def profile_memory(seconds: float = Query(default=10.0, gt=0), top: int = Query(default=25, ge=1, le=200)):
+    """Trace allocations for `seconds` and return the largest allocation sites still live."""
+    try:
+        with tracemalloc_capture(top=top) as result:
+            await asyncio.sleep(_window(seconds))
+    except CaptureBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return result
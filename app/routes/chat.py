@@ -1,73 +1,134 @@
 from __future__ import annotations
 
-from typing import List
-
+import asyncio
 import os
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import StreamingResponse
 
-from ..models import ChatRequest, ChatResponse, SourceItem
+from ..models import BatchChatRequest, BatchChatResult, ChatRequest, ChatResponse
 from ..llm import get_chat_model, get_embeddings
 from ..vector_store import get_vector_store
 from ..config import settings
+from ..prompts import build_qa_prompt, to_source_items
+from ..retrieval import retrieve
+from ..batch import answer_questions, retrieve_batch
+from ..resilience import CircuitOpenError, DeadlineExceeded, deadline_scope
+from ..tenancy import get_tenant
+from ..answer_cache import answer_key, cacheable_model, get_answer, set_answer
+from ..admission import AdmittedStreamingResponse, admission, get_controller, request_priority
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 
-SYSTEM_INSTRUCTION = (
-    "You are a helpful assistant. Answer the user's question using the provided context. "
-    "If the answer isn't in the context, say you don't know. Keep answers concise and cite sources when possible."
-)
+def _require_api_key() -> None:
+    if settings.llm_provider == "fake":
+        return
+    # Pre-check API key for clearer error than a 500
+    settings.ensure_google_key_env()
+    if not os.getenv("GOOGLE_API_KEY"):
+        raise HTTPException(status_code=401, detail="Missing GOOGLE_API_KEY or GEMMI_API_KEY/GEMINI_API_KEY in environment/.env")
 
 
-def _format_context(docs) -> str:
-    blocks = []
-    for i, d in enumerate(docs, start=1):
-        src = d.metadata.get("source") if hasattr(d, "metadata") else None
-        blocks.append(f"[Source {i}: {src}]\n{d.page_content}")
-    return "\n\n".join(blocks)
+@router.post("", response_model=ChatResponse, dependencies=[Depends(admission("chat"))])
+async def chat(payload: ChatRequest, tenant: str = Depends(get_tenant)) -> ChatResponse:
+    with deadline_scope(settings.request_deadline_seconds):
+        return await _chat(payload, tenant)
 
 
-@router.post("", response_model=ChatResponse)
-async def chat(payload: ChatRequest) -> ChatResponse:
+async def _chat(payload: ChatRequest, tenant: str) -> ChatResponse:
     try:
-        # Pre-check API key for clearer error than a 500
-        settings.ensure_google_key_env()
-        if not os.getenv("GOOGLE_API_KEY"):
-            raise HTTPException(status_code=401, detail="Missing GOOGLE_API_KEY or GEMMI_API_KEY/GEMINI_API_KEY in environment/.env")
+        _require_api_key()
+        cache_key = None
+        if settings.answer_cache_enabled and not payload.model:
+            cache_key = answer_key(payload.question, payload.top_k, payload.temperature, tenant)
+            cached = get_answer(cache_key)
+            if cached is not None:
+                return ChatResponse(**cached)
         embeddings = get_embeddings()
-        vs = get_vector_store(embeddings)
-        retriever = vs.as_retriever(search_kwargs={"k": payload.top_k})
+        vs = get_vector_store(embeddings, tenant=tenant)
 
-        # In newer LangChain, retrievers are Runnables; use invoke() to get documents
-        docs = retriever.invoke(payload.question)
+        # Blocking provider and store calls run off the event loop (the deadline goes with them)
+        hits = await asyncio.to_thread(retrieve, vs, payload.question, k=payload.top_k, tenant=tenant)
+        docs = [doc for doc, _ in hits]
         if not docs:
             raise HTTPException(status_code=404, detail="No data found in the knowledge base. Please ingest documents first.")
 
-        context = _format_context(docs)
-        prompt = (
-            f"{SYSTEM_INSTRUCTION}\n\n"
-            f"Context:\n{context}\n\n"
-            f"Question: {payload.question}\n"
-            f"Answer:"
-        )
+        prompt = build_qa_prompt(payload.question, docs)
 
         llm = get_chat_model(temperature=payload.temperature)
-        response = llm.invoke(prompt)
+        response, model = await llm.ainvoke_with_model(prompt)
         answer = response.content if hasattr(response, "content") else str(response)
 
-        sources: List[SourceItem] = []
-        for i, d in enumerate(docs, start=1):
-            sources.append(
-                SourceItem(
-                    id=str(i),
-                    score=d.metadata.get("score") if hasattr(d, "metadata") else None,
-                    source=d.metadata.get("source") if hasattr(d, "metadata") else None,
-                    content=d.page_content,
-                )
-            )
-
-        return ChatResponse(answer=answer, sources=sources)
-    except HTTPException:
+        result = ChatResponse(answer=answer, sources=to_source_items(docs))
+        if cache_key is not None and cacheable_model(model):
+            set_answer(cache_key, result.model_dump())
+        return result
+    except (HTTPException, DeadlineExceeded, CircuitOpenError):
+        # provider errors are mapped to 504/503 by the app-level handlers
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch")
+async def chat_batch(
+    payload: BatchChatRequest,
+    tenant: str = Depends(get_tenant),
+    x_priority: Optional[str] = Header(default=None),
+) -> StreamingResponse:
+    """
+    Answer many questions in one request, streaming one JSON object per line
+    (application/x-ndjson) as each answer completes. Lines arrive in completion
+    order; each carries the `index` of its question in the request.
+
+    Admitted at batch priority, holding one unit of the admission budget per concurrent
+    LLM call (so `concurrency` is capped by BATCH_ADMISSION_MAX_IN_FLIGHT) until the stream ends.
+    """
+    _require_api_key()
+    if len(payload.questions) > settings.batch_max_questions:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(payload.questions)} questions (max {settings.batch_max_questions})",
+        )
+
+    concurrency = payload.concurrency or settings.batch_max_concurrency
+    slot = None
+    if settings.admission_enabled:
+        slot = await get_controller().hold(request_priority(x_priority, "batch"), "chat_batch", weight=concurrency)
+        # Never run more LLM calls at once than the budget units granted
+        concurrency = slot.weight
+
+    # Retrieve before the 200 headers go out, so embedding/store failures get a proper status
+    try:
+        docs_per_question = await retrieve_batch(payload.questions, payload.top_k, tenant)
+    except BaseException as e:
+        # The response does not own the slot yet: give it back on any failure, cancellation included
+        if slot is not None:
+            slot.release()
+        if isinstance(e, Exception) and not isinstance(e, (DeadlineExceeded, CircuitOpenError)):
+            raise HTTPException(status_code=500, detail=str(e))
+        raise
+
+    async def _lines():
+        pending = set(range(len(payload.questions)))
+        try:
+            async for result in answer_questions(
+                payload.questions,
+                top_k=payload.top_k,
+                temperature=payload.temperature,
+                concurrency=concurrency,
+                tenant=tenant,
+                docs_per_question=docs_per_question,
+            ):
+                pending.discard(result.index)
+                yield result.model_dump_json() + "\n"
+        except Exception as e:
+            # Headers are already sent: report the failure on every unanswered question's line
+            for index in sorted(pending):
+                error = BatchChatResult(index=index, question=payload.questions[index], error=str(e))
+                yield error.model_dump_json() + "\n"
+
+    # The slot is released when the response finishes, however it ends
+    return AdmittedStreamingResponse(_lines(), slot, media_type="application/x-ndjson")
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
+import asyncio
 import datetime
 import re
 from typing import List, Optional, Literal
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 from bson import ObjectId
 
@@ -12,6 +13,12 @@ from ..db import get_db
 from ..llm import get_chat_model, get_embeddings
 from ..vector_store import get_vector_store
 from ..search_fix import serpapi_search
+from ..retrieval import retrieve
+from ..prompts import conversation_retrieval_query
+from ..config import settings
+from ..resilience import CircuitOpenError, DeadlineExceeded, deadline_scope, timeout_for
+from ..tenancy import get_tenant, tenant_filter
+from ..admission import admission
 
 router = APIRouter(prefix="/chats", tags=["chats"])
 
@@ -31,6 +38,14 @@ class FeedbackPayload(BaseModel):
     feedback: Literal["like", "dislike"]
 
 
+def _web_search(query: str, num: int):
+    """SerpAPI fallback bounded by what is left of the request deadline; skipped when nearly out."""
+    timeout = timeout_for(10)
+    if timeout is not None and timeout < 1:
+        return []
+    return serpapi_search(query, num=num, timeout=timeout)
+
+
 def oid_to_str(d: dict) -> dict:
     d = dict(d)
     if "_id" in d:
@@ -40,9 +55,9 @@ def oid_to_str(d: dict) -> dict:
 
 
 @router.get("")
-async def list_chats():
+async def list_chats(tenant: str = Depends(get_tenant)):
     db = get_db()
-    cursor = db.chats.find().sort("updated_at", -1)
+    cursor = db.chats.find(tenant_filter(tenant)).sort("updated_at", -1)
     items = []
     async for c in cursor:
         items.append(oid_to_str(c))
@@ -50,10 +65,10 @@ async def list_chats():
 
 
 @router.post("")
-async def create_chat(payload: ChatCreate):
+async def create_chat(payload: ChatCreate, tenant: str = Depends(get_tenant)):
     db = get_db()
     now = datetime.datetime.utcnow()
-    doc = {"title": payload.title, "created_at": now, "updated_at": now}
+    doc = {"tenant_id": tenant, "title": payload.title, "created_at": now, "updated_at": now}
     res = await db.chats.insert_one(doc)
     # fetch the created document and sanitize ObjectId
     created = await db.chats.find_one({"_id": res.inserted_id})
@@ -61,13 +76,13 @@ async def create_chat(payload: ChatCreate):
 
 
 @router.get("/{chat_id}")
-async def get_chat(chat_id: str):
+async def get_chat(chat_id: str, tenant: str = Depends(get_tenant)):
     db = get_db()
-    c = await db.chats.find_one({"_id": ObjectId(chat_id)})
+    c = await db.chats.find_one({"_id": ObjectId(chat_id), **tenant_filter(tenant)})
     if not c:
         raise HTTPException(status_code=404, detail="Chat not found")
     msgs = []
-    cursor = db.messages.find({"chat_id": chat_id}).sort("created_at", 1)
+    cursor = db.messages.find({**tenant_filter(tenant), "chat_id": chat_id}).sort("created_at", 1)
     async for m in cursor:
         m = oid_to_str(m)
         msgs.append(m)
@@ -77,23 +92,30 @@ async def get_chat(chat_id: str):
 
 
 @router.delete("/{chat_id}")
-async def delete_chat(chat_id: str):
+async def delete_chat(chat_id: str, tenant: str = Depends(get_tenant)):
     db = get_db()
-    await db.chats.delete_one({"_id": ObjectId(chat_id)})
-    await db.messages.delete_many({"chat_id": chat_id})
+    await db.chats.delete_one({"_id": ObjectId(chat_id), **tenant_filter(tenant)})
+    await db.messages.delete_many({**tenant_filter(tenant), "chat_id": chat_id})
     return {"deleted": True}
 
 
-@router.post("/{chat_id}/messages")
-async def post_message(chat_id: str, payload: MessageCreate):
+@router.post("/{chat_id}/messages", dependencies=[Depends(admission("chat_messages"))])
+async def post_message(chat_id: str, payload: MessageCreate, tenant: str = Depends(get_tenant)):
+    # One deadline covers retrieval, web search and generation for this message
+    with deadline_scope(settings.request_deadline_seconds):
+        return await _post_message(chat_id, payload, tenant)
+
+
+async def _post_message(chat_id: str, payload: MessageCreate, tenant: str):
     db = get_db()
-    # ensure chat exists
-    c = await db.chats.find_one({"_id": ObjectId(chat_id)})
+    # ensure chat exists (and belongs to this tenant)
+    c = await db.chats.find_one({"_id": ObjectId(chat_id), **tenant_filter(tenant)})
     if not c:
         raise HTTPException(status_code=404, detail="Chat not found")
 
     now = datetime.datetime.utcnow()
     user_msg = {
+        "tenant_id": tenant,
         "chat_id": chat_id,
         "role": "user",
         "content": payload.content,
@@ -101,7 +123,7 @@ async def post_message(chat_id: str, payload: MessageCreate):
     }
     await db.messages.insert_one(user_msg)
     # retrieve recent messages (last 10) in chronological order
-    cursor = db.messages.find({"chat_id": chat_id}).sort("created_at", -1).limit(10)
+    cursor = db.messages.find({**tenant_filter(tenant), "chat_id": chat_id}).sort("created_at", -1).limit(10)
     recent_rev = []
     async for m in cursor:
         recent_rev.append(m)
@@ -109,39 +131,34 @@ async def post_message(chat_id: str, payload: MessageCreate):
 
     # retrieval from vector store
     embeddings = get_embeddings()
-    vs = get_vector_store(embeddings)
+    vs = get_vector_store(embeddings, tenant=tenant)
     # Build a retrieval query from the current question plus recent messages (user + assistant)
-    last_user_msgs = [m.get("content") for m in recent if m.get("role") == "user"]
-    last_assistant_msgs = [m.get("content") for m in recent if m.get("role") == "assistant"]
-    # include up to the last 3 user and last 2 assistant messages to provide context
-    parts = []
-    if last_user_msgs:
-        parts.append(" ".join(last_user_msgs[-3:]))
-    if last_assistant_msgs:
-        parts.append(" ".join(last_assistant_msgs[-2:]))
-    parts.append(payload.content)
-    retrieval_query = " ".join(parts)
+    retrieval_query = conversation_retrieval_query(recent, payload.content)
     try:
-        # Use Chroma's similarity_search_with_score to get relevance scores
-        docs_with_scores = vs.similarity_search_with_score(retrieval_query, k=payload.top_k)
+        # Scored similarity search; repeated retrieval queries are served from the retrieval cache.
+        # Blocking provider and store calls run off the event loop (the deadline goes with them)
+        docs_with_scores = await asyncio.to_thread(retrieve, vs, retrieval_query, k=payload.top_k, tenant=tenant)
         # Filter out results with low relevance (distance > 0.8 means quite irrelevant)
         relevant_docs = [(doc, score) for doc, score in docs_with_scores if score < 0.8]
         docs = [doc for doc, score in relevant_docs]
         
         
+    except (DeadlineExceeded, CircuitOpenError):
+        # out of time or provider down: don't retry the same provider via the fallbacks below
+        raise
     except Exception as e:
         try:
             # fallback to regular similarity_search if score version fails
-            docs = vs.similarity_search(retrieval_query, k=payload.top_k)
+            docs = await asyncio.to_thread(vs.similarity_search, retrieval_query, k=payload.top_k)
         except Exception:
             # final fallback to retriever if similarity_search isn't available
             retriever = vs.as_retriever(search_kwargs={"k": payload.top_k})
-            docs = retriever.invoke(payload.content)
+            docs = await asyncio.to_thread(retriever.invoke, payload.content)
 
     # If no relevant local docs were found, try a web search fallback (SerpAPI) if configured
     if not docs:
         try:
-            web_docs = serpapi_search(retrieval_query, num=payload.top_k)
+            web_docs = await asyncio.to_thread(_web_search, retrieval_query, num=payload.top_k)
             if web_docs:
                 docs = web_docs
         except Exception as e:
@@ -184,14 +201,14 @@ async def post_message(chat_id: str, payload: MessageCreate):
     )
 
     llm = get_chat_model(temperature=payload.temperature)
-    response = llm.invoke(prompt)
+    response = await llm.ainvoke(prompt)
     answer = response.content if hasattr(response, "content") else str(response)
 
     # If the LLM says it doesn't know and we have web search available, try web search
     if ("don't know" in answer.lower() or "do not know" in answer.lower() or 
         "cannot be found" in answer.lower() or "not contain" in answer.lower()):
         try:
-            web_docs = serpapi_search(payload.content, num=3)
+            web_docs = await asyncio.to_thread(_web_search, payload.content, num=3)
             if web_docs:
                 # Rebuild prompt with web sources
                 web_doc_blocks = []
@@ -210,7 +227,7 @@ async def post_message(chat_id: str, payload: MessageCreate):
                     f"Assistant:"
                 )
                 
-                web_response = llm.invoke(web_prompt)
+                web_response = await llm.ainvoke(web_prompt)
                 web_answer = web_response.content if hasattr(web_response, "content") else str(web_response)
                 
                 # Use web answer and sources if it's more informative
@@ -222,6 +239,7 @@ async def post_message(chat_id: str, payload: MessageCreate):
             pass
 
     assistant_msg = {
+        "tenant_id": tenant,
         "chat_id": chat_id,
         "role": "assistant",
         "content": answer,
@@ -245,7 +263,7 @@ async def post_message(chat_id: str, payload: MessageCreate):
                 "Return only the title text without extra punctuation.\n\nConversation:\n"
                 + (history if history else payload.content)
             )
-            title_resp = get_chat_model(temperature=0.0).invoke(title_prompt)
+            title_resp = await get_chat_model(temperature=0.0).ainvoke(title_prompt)
             title_text = title_resp.content.strip() if hasattr(title_resp, "content") else str(title_resp).strip()
             if title_text:
                 # sanitize and shorten the title: collapse whitespace, limit words and chars
@@ -272,7 +290,7 @@ async def post_message(chat_id: str, payload: MessageCreate):
 
 
 @router.post("/messages/{message_id}/feedback")
-async def message_feedback(message_id: str, payload: FeedbackPayload):
+async def message_feedback(message_id: str, payload: FeedbackPayload, tenant: str = Depends(get_tenant)):
     """Attach feedback ('like' or 'dislike') to a message by its id."""
     db = get_db()
     # ensure message exists
@@ -281,7 +299,7 @@ async def message_feedback(message_id: str, payload: FeedbackPayload):
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid message id")
 
-    msg = await db.messages.find_one({"_id": oid})
+    msg = await db.messages.find_one({"_id": oid, **tenant_filter(tenant)})
     if not msg:
         raise HTTPException(status_code=404, detail="Message not found")
 
@@ -3,7 +3,6 @@ from __future__ import annotations
 import os
 from typing import List
 
-import requests
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -19,7 +18,7 @@ class WebDoc:
         self.page_content = snippet
 
 
-def serpapi_search(query: str, num: int = 5) -> List[WebDoc]:
+def serpapi_search(query: str, num: int = 5, timeout: float = 10) -> List[WebDoc]:
     """Perform a SerpAPI search and return a list of WebDoc objects containing snippet + url.
 
     Requires SERPAPI_API_KEY in environment or .env.
@@ -27,6 +26,8 @@ def serpapi_search(query: str, num: int = 5) -> List[WebDoc]:
     if not SERPAPI_KEY:
         raise RuntimeError("SERPAPI_API_KEY not set in environment (.env)")
 
+    import requests
+
     params = {
         "q": query,
         "api_key": SERPAPI_KEY,
@@ -34,7 +35,7 @@ def serpapi_search(query: str, num: int = 5) -> List[WebDoc]:
         "num": num,
     }
 
-    resp = requests.get(SERPAPI_ENDPOINT, params=params, timeout=10)
+    resp = requests.get(SERPAPI_ENDPOINT, params=params, timeout=timeout)
     resp.raise_for_status()
     data = resp.json()
 
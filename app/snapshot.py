@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import datetime
+import json
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .config import settings
+from .generation import Generation, bump_generation, new_generation_dir, publish
+from .tenancy import collection_for, resolve_tenant
+from .vector_store import get_chroma_store, list_tenants
+
+
+# Bump when the on-disk layout changes; import refuses versions it does not know.
+SNAPSHOT_FORMAT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+RECORDS_FILE = "records.jsonl"
+# Inside a published generation: the default tenant's snapshot sits at the root,
+# every other tenant's in tenants/<tenant>/
+TENANTS_DIR = "tenants"
+
+_EXPORT_PAGE_SIZE = 1000
+
+
+def _iter_collection(collection) -> Iterator[Tuple[List[str], List[str], List[Dict[str, Any]], Any]]:
+    offset = 0
+    while True:
+        page = collection.get(
+            limit=_EXPORT_PAGE_SIZE,
+            offset=offset,
+            include=["documents", "metadatas", "embeddings"],
+        )
+        if not page["ids"]:
+            return
+        yield page["ids"], page["documents"], page["metadatas"], page["embeddings"]
+        offset += len(page["ids"])
+
+
+def export_snapshot(out_dir: str, tenant: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Write `tenant`'s collection (default tenant if None) to `out_dir` as a versioned snapshot:
+
+    - manifest.json  - format version, collection, embedding model, row count, dimension
+    - embeddings.npy - float32 matrix, one row per chunk, same order as records.jsonl
+    - records.jsonl  - {"id", "text", "metadata"} per chunk
+
+    Returns the manifest.
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    vs = get_chroma_store(None, tenant=tenant)
+    ids_seen = 0
+    matrices = []
+    with (out / RECORDS_FILE).open("w", encoding="utf-8") as f:
+        for ids, texts, metas, embs in _iter_collection(vs._collection):
+            for i, t, m in zip(ids, texts, metas):
+                f.write(json.dumps({"id": i, "text": t, "metadata": m or {}}, ensure_ascii=False) + "\n")
+            matrices.append(np.asarray(embs, dtype=np.float32))
+            ids_seen += len(ids)
+
+    matrix = np.vstack(matrices) if matrices else np.zeros((0, 0), dtype=np.float32)
+    np.save(out / EMBEDDINGS_FILE, matrix)
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "collection_name": collection_for(tenant),
+        "tenant": resolve_tenant(tenant),
+        "embedding_model": settings.embedding_model,
+        "count": ids_seen,
+        "dimension": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        "created_at": datetime.datetime.utcnow().isoformat() + "Z",
+    }
+    # Manifest is written last so a snapshot without one is recognisably incomplete
+    (out / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def read_manifest(snapshot_dir: str) -> Dict[str, Any]:
+    path = Path(snapshot_dir) / MANIFEST_FILE
+    if not path.exists():
+        raise FileNotFoundError(f"Snapshot manifest not found: {path}")
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported snapshot format version {manifest.get('format_version')!r} "
+            f"(expected {SNAPSHOT_FORMAT_VERSION})"
+        )
+    return manifest
+
+
+def read_records(snapshot_dir: str) -> Iterator[Dict[str, Any]]:
+    with (Path(snapshot_dir) / RECORDS_FILE).open("r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def import_snapshot(snapshot_dir: str, force: bool = False, tenant: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Bulk-load a snapshot into `tenant`'s collection without calling the embedding API.
+
+    The target collection must be empty. Unless `force` is set, the snapshot must have been
+    produced with the same embedding model as the current settings, otherwise queries would
+    be embedded into a different vector space than the stored chunks.
+    """
+    manifest = read_manifest(snapshot_dir)
+    if not force and manifest["embedding_model"] != settings.embedding_model:
+        raise ValueError(
+            f"Snapshot was built with embedding model {manifest['embedding_model']!r} "
+            f"but EMBEDDING_MODEL is {settings.embedding_model!r}; pass force=True to import anyway"
+        )
+
+    vs = get_chroma_store(None, tenant=tenant)
+    collection = vs._collection
+    if collection.count() > 0:
+        raise ValueError(
+            f"Collection {collection_for(tenant)!r} is not empty; import only into an empty store"
+        )
+
+    matrix = np.load(Path(snapshot_dir) / EMBEDDINGS_FILE, mmap_mode="r")
+    if matrix.shape[0] != manifest["count"]:
+        raise ValueError(f"Snapshot is inconsistent: manifest count {manifest['count']} != {matrix.shape[0]} embeddings")
+
+    batch_size = vs._client.get_max_batch_size()
+    ids: List[str] = []
+    texts: List[str] = []
+    metas: List[Dict[str, Any]] = []
+    row = 0
+
+    def _flush() -> None:
+        nonlocal row
+        if not ids:
+            return
+        collection.add(
+            ids=list(ids),
+            documents=list(texts),
+            # Chroma rejects empty metadata dicts
+            metadatas=[m or None for m in metas],
+            embeddings=np.asarray(matrix[row : row + len(ids)]),
+        )
+        row += len(ids)
+        ids.clear()
+        texts.clear()
+        metas.clear()
+
+    for rec in read_records(snapshot_dir):
+        ids.append(rec["id"])
+        texts.append(rec["text"])
+        metas.append(rec.get("metadata") or {})
+        if len(ids) >= batch_size:
+            _flush()
+    _flush()
+    bump_generation(resolve_tenant(tenant))
+
+    return manifest
+
+
+def tenant_snapshot_dir(generation_dir: Path, tenant: str) -> Path:
+    if tenant == settings.default_tenant:
+        return generation_dir
+    return generation_dir / TENANTS_DIR / tenant
+
+
+def publish_snapshot(keep: int = 2) -> Tuple[Generation, Dict[str, Any]]:
+    """
+    Export every tenant's Chroma collection as the next index generation and atomically make
+    it current. Workers running with INDEX_BACKEND=snapshot switch to it on their next request.
+    Returns the generation and the default tenant's manifest.
+    """
+    build_dir = new_generation_dir()
+    try:
+        manifest = export_snapshot(str(build_dir))
+        for tenant in list_tenants():
+            if tenant != settings.default_tenant:
+                export_snapshot(str(tenant_snapshot_dir(build_dir, tenant)), tenant=tenant)
+    except Exception:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+    return publish(build_dir, keep=keep), manifest
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import json
+import mmap
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from .generation import read_current
+from .snapshot import EMBEDDINGS_FILE, MANIFEST_FILE, RECORDS_FILE, read_manifest, tenant_snapshot_dir
+from .tenancy import resolve_tenant
+
+
+class SnapshotIndex:
+    """
+    Read-only, memory-mapped view of one published snapshot.
+
+    Both the embedding matrix and records.jsonl are mapped rather than read, so N worker
+    processes serving the same generation share one copy in the OS page cache. Only a
+    line-offset table and the row norms are private to each process.
+    """
+
+    def __init__(self, snapshot_dir: Path) -> None:
+        self.path = Path(snapshot_dir)
+        self.manifest = read_manifest(str(self.path))
+        self.matrix = np.load(self.path / EMBEDDINGS_FILE, mmap_mode="r")
+        self._records_file = (self.path / RECORDS_FILE).open("rb")
+        size = (self.path / RECORDS_FILE).stat().st_size
+        self._records = (
+            mmap.mmap(self._records_file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        )
+        # Byte offset of each record's line start, in matrix row order
+        newlines = np.flatnonzero(np.frombuffer(self._records, dtype=np.uint8) == ord("\n"))
+        self._line_starts = np.concatenate(([0], newlines[:-1] + 1)).astype(np.int64) if len(newlines) else np.zeros(0, np.int64)
+        self._line_ends = newlines
+        self._sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix) if len(self.matrix) else np.zeros(0, np.float32)
+        self._ids: Optional[Dict[str, int]] = None
+        self._ids_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return int(self.matrix.shape[0])
+
+    def record(self, row: int) -> Dict[str, Any]:
+        return json.loads(self._records[self._line_starts[row] : self._line_ends[row]])
+
+    def document(self, row: int) -> Document:
+        rec = self.record(row)
+        return Document(id=rec["id"], page_content=rec["text"], metadata=rec.get("metadata") or {})
+
+    def row_for_id(self, doc_id: str) -> Optional[int]:
+        if self._ids is None:
+            with self._ids_lock:
+                if self._ids is None:
+                    self._ids = {self.record(r)["id"]: r for r in range(len(self))}
+        return self._ids.get(doc_id)
+
+    def search(self, vectors: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        """Exact top-k by squared L2 distance (Chroma's default space, so score thresholds carry over)."""
+        if len(self) == 0:
+            return [[] for _ in range(len(vectors))]
+        k = min(k, len(self))
+        q = np.asarray(vectors, dtype=np.float32)
+        dists = self._sq_norms[None, :] - 2.0 * (q @ self.matrix.T) + np.einsum("ij,ij->i", q, q)[:, None]
+        out: List[List[Tuple[int, float]]] = []
+        for row in dists:
+            top = np.argpartition(row, k - 1)[:k]
+            top = top[np.argsort(row[top])]
+            out.append([(int(i), float(max(row[i], 0.0))) for i in top])
+        return out
+
+    def close(self) -> None:
+        if isinstance(self._records, mmap.mmap):
+            self._records.close()
+        self._records_file.close()
+
+
+class SnapshotVectorStore(VectorStore):
+    """
+    LangChain VectorStore over a SnapshotIndex. Read-only: ingestion goes through Chroma.
+    `index` is None for a tenant with nothing published, which behaves as an empty store.
+    """
+
+    def __init__(self, index: Optional[SnapshotIndex], embeddings: Embeddings) -> None:
+        self.index = index
+        self._embeddings = embeddings
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embeddings
+
+    def _check_filter(self, filter: Optional[Dict]) -> None:
+        if filter:
+            raise ValueError("Metadata filters are not supported by the snapshot index backend")
+
+    def query_by_vectors(
+        self, vectors: List[List[float]], k: int = 4, where: Optional[Dict] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        self._check_filter(where)
+        if self.index is None:
+            return [[] for _ in vectors]
+        return [
+            [(self.index.document(row), dist) for row, dist in hits]
+            for hits in self.index.search(np.asarray(vectors, dtype=np.float32), k)
+        ]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[Dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.query_by_vectors([self._embeddings.embed_query(query)], k=k, where=filter)[0]
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.query_by_vectors([embedding], k=k, where=filter)[0]]
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[Dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
+        if self.index is None:
+            return []
+        rows = [self.index.row_for_id(i) for i in ids]
+        return [self.index.document(r) for r in rows if r is not None]
+
+    def add_texts(self, texts, metadatas=None, **kwargs: Any) -> List[str]:
+        raise NotImplementedError("The snapshot index is read-only; ingest into Chroma and publish a new generation")
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs: Any) -> "SnapshotVectorStore":
+        raise NotImplementedError("The snapshot index is read-only; ingest into Chroma and publish a new generation")
+
+
+_loaded: Dict[Path, SnapshotIndex] = {}
+_loaded_lock = threading.Lock()
+
+
+def current_index(tenant: Optional[str] = None) -> Optional[SnapshotIndex]:
+    """
+    `tenant`'s SnapshotIndex in the published generation, reopened when a new one is published;
+    None if the tenant has nothing published.
+    """
+    gen = read_current()
+    if gen.path is None:
+        raise RuntimeError("No index generation has been published yet; run `scripts/snapshot.py publish`")
+    # Keyed on the snapshot path: bump_generation() advances the number without new data
+    path = tenant_snapshot_dir(gen.path, resolve_tenant(tenant))
+    index = _loaded.get(path)
+    if index is not None:
+        return index
+    if not (path / MANIFEST_FILE).exists():
+        return None
+    with _loaded_lock:
+        if path not in _loaded:
+            # Drop indexes from older generations; requests still holding one finish against
+            # it (the files stay on disk until pruned) and the GC unmaps it afterwards
+            for old in [p for p in _loaded if gen.path not in p.parents and p != gen.path]:
+                del _loaded[old]
+            _loaded[path] = SnapshotIndex(path)
+        return _loaded[path]
+
+
+def get_snapshot_store(embeddings: Embeddings, tenant: Optional[str] = None) -> SnapshotVectorStore:
+    return SnapshotVectorStore(current_index(tenant), embeddings)
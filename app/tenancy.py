@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Optional
+
+from fastapi import Header, HTTPException
+
+from .config import settings
+
+
+# Tenant ids become part of Chroma collection names (3-63 chars of [a-zA-Z0-9._-], starting
+# and ending alphanumeric), so keep them to a conservative subset.
+_TENANT_RE = re.compile(r"^[a-z0-9](?:[a-z0-9_-]{0,38}[a-z0-9])?$")
+
+TENANT_COLLECTION_SEP = "__t_"
+
+
+def resolve_tenant(tenant: Optional[str]) -> str:
+    """Normalise a tenant id (None -> default tenant); ValueError if it is not a valid id."""
+    tenant = (tenant or settings.default_tenant).strip().lower()
+    if not _TENANT_RE.match(tenant):
+        raise ValueError(
+            f"Invalid tenant id {tenant!r}: use 1-40 lowercase letters, digits, '-' or '_'"
+        )
+    return tenant
+
+
+def collection_for(tenant: Optional[str]) -> str:
+    """Chroma collection holding `tenant`'s chunks. The default tenant keeps COLLECTION_NAME."""
+    tenant = resolve_tenant(tenant)
+    if tenant == settings.default_tenant:
+        return settings.collection_name
+    return f"{settings.collection_name}{TENANT_COLLECTION_SEP}{tenant}"
+
+
+def tenant_from_collection(name: str) -> Optional[str]:
+    """Inverse of collection_for; None for collections that are not ours."""
+    if name == settings.collection_name:
+        return settings.default_tenant
+    prefix = settings.collection_name + TENANT_COLLECTION_SEP
+    return name[len(prefix):] if name.startswith(prefix) else None
+
+
+def tenant_filter(tenant: str) -> Dict[str, Any]:
+    """Mongo filter for a tenant's chats/messages. Documents written before tenancy
+    (no tenant_id field) belong to the default tenant."""
+    if tenant == settings.default_tenant:
+        return {"tenant_id": {"$in": [tenant, None]}}
+    return {"tenant_id": tenant}
+
+
+def get_tenant(x_tenant_id: Optional[str] = Header(default=None)) -> str:
+    """FastAPI dependency: tenant from the X-Tenant-ID header, default tenant if absent."""
+    try:
+        return resolve_tenant(x_tenant_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,22 +1,104 @@
 from __future__ import annotations
 
-from typing import Optional
-
-from langchain_community.vectorstores import Chroma
-from langchain_core.embeddings import Embeddings
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 from .config import settings
+from .tenancy import collection_for
+
+if TYPE_CHECKING:
+    from langchain_community.vectorstores import Chroma
+    from langchain_core.documents import Document
+    from langchain_core.embeddings import Embeddings
+
+
+def get_vector_store(embeddings: Embeddings, create: bool = True, tenant: Optional[str] = None) -> Chroma:
+    """Store for `tenant` (default tenant if None); each tenant is a separate collection."""
+    if settings.index_backend == "snapshot":
+        # Multi-worker serving: shared read-only mmap of the published generation
+        from .snapshot_store import get_snapshot_store
+
+        return get_snapshot_store(embeddings, tenant=tenant)
+    if settings.index_backend != "chroma":
+        raise ValueError(f"Unknown INDEX_BACKEND: {settings.index_backend!r} (expected 'chroma' or 'snapshot')")
+    return get_chroma_store(embeddings, tenant=tenant)
 
 
-def get_vector_store(embeddings: Embeddings, create: bool = True) -> Chroma:
+def get_chroma_store(embeddings: Embeddings, tenant: Optional[str] = None) -> Chroma:
+    """The writable Chroma collection, regardless of INDEX_BACKEND (ingestion, snapshots)."""
+    # Imported on first use: chromadb + langchain_community dominate app import time
+    from langchain_community.vectorstores import Chroma
+
     # Chroma creates the store if not present; persistent dir ensures data survives restarts
     return Chroma(
-        collection_name=settings.collection_name,
+        collection_name=collection_for(tenant),
         embedding_function=embeddings,
         persist_directory=settings.vector_store_dir,
     )
 
 
-def get_retriever(embeddings: Embeddings, k: int = 4):
-    vs = get_vector_store(embeddings)
+def list_tenants() -> List[str]:
+    """Tenants that have a collection in the Chroma store."""
+    from .tenancy import tenant_from_collection
+
+    client = get_chroma_store(None)._client
+    names = [c if isinstance(c, str) else c.name for c in client.list_collections()]
+    return sorted(t for t in (tenant_from_collection(n) for n in names) if t is not None)
+
+
+def get_retriever(embeddings: Embeddings, k: int = 4, tenant: Optional[str] = None):
+    vs = get_vector_store(embeddings, tenant=tenant)
     return vs.as_retriever(search_kwargs={"k": k})
+
+
+def query_by_vectors(
+    vs: Chroma,
+    vectors: List[List[float]],
+    k: int = 4,
+    where: Optional[Dict] = None,
+) -> List[List[Tuple[Document, float]]]:
+    """Run several nearest-neighbour queries against the collection in one call.
+
+    Returns one list of (document, distance) pairs per input vector, in input order.
+    Documents carry their Chroma id so callers can refer back to the stored chunk.
+    """
+    from langchain_core.documents import Document
+
+    if not vectors:
+        return []
+    if hasattr(vs, "query_by_vectors"):
+        # SnapshotVectorStore answers batched queries natively
+        return vs.query_by_vectors(vectors, k=k, where=where)
+    results = vs._collection.query(
+        query_embeddings=vectors,
+        n_results=k,
+        where=where,
+        include=["documents", "metadatas", "distances"],
+    )
+    out: List[List[Tuple[Document, float]]] = []
+    for ids, texts, metas, dists in zip(
+        results["ids"], results["documents"], results["metadatas"], results["distances"]
+    ):
+        out.append(
+            [
+                (Document(id=i, page_content=t, metadata=m or {}), d)
+                for i, t, m, d in zip(ids, texts, metas, dists)
+            ]
+        )
+    return out
+
+
+def fetch_by_ids(vs: Chroma, ids: List[str]) -> List[Document]:
+    """Load stored chunks by id, in the order given; ids no longer in the store are skipped."""
+    from langchain_core.documents import Document
+
+    if not ids:
+        return []
+    if not hasattr(vs, "_collection"):
+        # SnapshotVectorStore implements the LangChain get_by_ids API
+        return vs.get_by_ids(ids)
+    got = vs._collection.get(ids=ids, include=["documents", "metadatas"])
+    by_id = {
+        i: Document(id=i, page_content=t, metadata=m or {})
+        for i, t, m in zip(got["ids"], got["documents"], got["metadatas"])
+    }
+    return [by_id[i] for i in ids if i in by_id]
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class WarmupState:
+    """Process-wide readiness flag, set once the heavy dependencies are loaded and exercised."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # cold -> warming -> ready | failed (-> warming again on retry); skipped when disabled
+        self.status = "cold"
+        self.error: Optional[str] = None
+        self.duration_s: Optional[float] = None
+        self.attempts = 0
+
+    def set(self, status: str, error: Optional[str] = None, duration_s: Optional[float] = None) -> None:
+        with self._lock:
+            self.status = status
+            self.error = error
+            self.duration_s = duration_s
+            if status == "warming":
+                self.attempts += 1
+
+    @property
+    def ready(self) -> bool:
+        # skipped: WARMUP_ON_STARTUP=false, so the first request pays for loading instead
+        return self.status in ("ready", "skipped")
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = {"status": self.status}
+            if self.error:
+                out["error"] = self.error
+            if self.attempts > 1:
+                out["attempts"] = self.attempts
+            if self.duration_s is not None:
+                out["warmup_seconds"] = round(self.duration_s, 3)
+            return out
+
+
+state = WarmupState()
+
+
+def warm_up() -> bool:
+    """
+    Import the LLM/vector store stack, open the vector store and run one query so the
+    first real request does not pay for it. Blocking; run it off the event loop.
+    Returns whether it succeeded.
+    """
+    state.set("warming")
+    started = time.perf_counter()
+    try:
+        from .llm import get_embeddings
+        from .vector_store import get_vector_store
+
+        vs = get_vector_store(get_embeddings())
+        vs.similarity_search("warm-up", k=1)
+    except Exception as e:
+        state.set("failed", error=str(e), duration_s=time.perf_counter() - started)
+        return False
+    state.set("ready", duration_s=time.perf_counter() - started)
+    return True
+
+
+async def warm_up_until_ready(initial_delay: float = 1.0, max_delay: Optional[float] = None) -> None:
+    """
+    Run warm_up() off the event loop, retrying with exponential backoff (capped at
+    `max_delay`, default WARMUP_RETRY_MAX_SECONDS) until it succeeds, so a store or provider
+    that is briefly unavailable at startup does not leave the worker unready for good.
+    """
+    from .config import settings
+
+    cap = settings.warmup_retry_max_seconds if max_delay is None else max_delay
+    delay = initial_delay
+    while not await asyncio.to_thread(warm_up):
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, cap)
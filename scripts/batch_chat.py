@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Answer a file of questions (one per line) against the knowledge base and write
+one JSON result per line, in input order.
+
+Usage: PYTHONPATH=. python scripts/batch_chat.py questions.txt [-o results.jsonl] [--concurrency 8]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from app.batch import run_batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("questions_file", type=Path)
+    parser.add_argument("-o", "--output", type=Path, default=None, help="write JSON lines here instead of stdout")
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--temperature", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=None)
+    args = parser.parse_args()
+
+    questions = [line.strip() for line in args.questions_file.read_text(encoding="utf-8").splitlines() if line.strip()]
+    if not questions:
+        print("No questions found.", file=sys.stderr)
+        sys.exit(0)
+
+    started = time.perf_counter()
+    results = run_batch(questions, top_k=args.top_k, temperature=args.temperature, concurrency=args.concurrency)
+    elapsed = time.perf_counter() - started
+
+    out = args.output.open("w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for r in results:
+            out.write(r.model_dump_json() + "\n")
+    finally:
+        if args.output:
+            out.close()
+
+    failed = sum(1 for r in results if r.error)
+    print(f"Answered {len(results) - failed}/{len(results)} questions in {elapsed:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark query latency as the number of tenants grows.
+
+Compares the per-tenant collection layout (what get_vector_store(tenant=...) uses) with the
+old single shared collection that holds every tenant's chunks. Runs entirely locally: vectors
+are random and queries go straight to Chroma, so no embedding API calls are made.
+
+Usage: PYTHONPATH=. python scripts/bench_tenants.py [--tenants 1 4 16 32] [--chunks-per-tenant 1000]
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+from app.config import settings
+from app.vector_store import get_chroma_store, query_by_vectors
+
+
+def _unit_vectors(rng: np.random.Generator, n: int, dim: int) -> np.ndarray:
+    v = rng.standard_normal((n, dim)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def _add(collection, prefix: str, vectors: np.ndarray, tenant: str, batch: int) -> None:
+    for start in range(0, len(vectors), batch):
+        chunk = vectors[start : start + batch]
+        collection.add(
+            ids=[f"{prefix}-{start + i}" for i in range(len(chunk))],
+            embeddings=chunk,
+            documents=[f"{tenant} chunk {start + i}" for i in range(len(chunk))],
+            metadatas=[{"tenant": tenant}] * len(chunk),
+        )
+
+
+def _latencies(vs, queries: np.ndarray, k: int) -> List[float]:
+    out = []
+    for q in queries:
+        started = time.perf_counter()
+        query_by_vectors(vs, [q.tolist()], k=k)
+        out.append((time.perf_counter() - started) * 1000)
+    return out
+
+
+def _p(values: List[float], pct: float) -> float:
+    return float(np.percentile(values, pct))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenants", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--chunks-per-tenant", type=int, default=1000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory(prefix="bench_tenants_") as tmp:
+        settings.vector_store_dir = tmp
+        settings.collection_name = "bench"
+        shared = get_chroma_store(None, tenant="shared-baseline")
+        batch = shared._client.get_max_batch_size()
+        queries = _unit_vectors(rng, args.queries, args.dim)
+
+        print(f"{'tenants':>8} {'total chunks':>13} | {'per-tenant p50/p95 ms':>22} | {'shared p50/p95 ms':>18}")
+        built = 0
+        for target in sorted(args.tenants):
+            while built < target:
+                tenant = f"t{built}"
+                vectors = _unit_vectors(rng, args.chunks_per_tenant, args.dim)
+                _add(get_chroma_store(None, tenant=tenant)._collection, tenant, vectors, tenant, batch)
+                _add(shared._collection, tenant, vectors, tenant, batch)
+                built += 1
+
+            # Always query the first tenant: its collection size is constant across rows
+            per_tenant = _latencies(get_chroma_store(None, tenant="t0"), queries, args.k)
+            single = _latencies(shared, queries, args.k)
+            print(
+                f"{target:>8} {target * args.chunks_per_tenant:>13} | "
+                f"{_p(per_tenant, 50):>10.2f} / {_p(per_tenant, 95):>9.2f} | "
+                f"{_p(single, 50):>7.2f} / {_p(single, 95):>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
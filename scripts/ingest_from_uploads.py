@@ -1,13 +1,19 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-import shutil
+import argparse
 import sys
+import time
+from contextlib import nullcontext
 from pathlib import Path
 from typing import List
 
 from app.ingest import ingest_file_paths
 from app.config import settings
+from app.profiling import StageProfiler
+from app.snapshot import publish_snapshot
+from app.tenancy import collection_for
+from app.vector_store import get_chroma_store
 
 
 def find_pdfs_in_uploads(upload_dir: Path) -> List[str]:
@@ -15,29 +21,68 @@ def find_pdfs_in_uploads(upload_dir: Path) -> List[str]:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Rebuild the vector store from PDFs in data/uploads.")
+    parser.add_argument("--chunk-size", type=int, default=None, help=f"override CHUNK_SIZE (default {settings.chunk_size})")
+    parser.add_argument("--chunk-overlap", type=int, default=None, help=f"override CHUNK_OVERLAP (default {settings.chunk_overlap})")
+    parser.add_argument("--tenant", default=None, help="ingest into this tenant's collection (default tenant if omitted)")
+    parser.add_argument("--uploads-dir", type=Path, default=None, help="directory to scan for PDFs (default data/uploads)")
+    parser.add_argument("--publish", action="store_true", help="publish the rebuilt index as a new generation for snapshot-backed workers")
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        nargs="?",
+        const=Path("profiles") / time.strftime("ingest-%Y%m%d-%H%M%S"),
+        default=None,
+        metavar="DIR",
+        help="write per-stage CPU/peak-memory reports and cProfile dumps to DIR (default profiles/ingest-<timestamp>)",
+    )
+    args = parser.parse_args()
+    if args.chunk_size is not None:
+        settings.chunk_size = args.chunk_size
+    if args.chunk_overlap is not None:
+        settings.chunk_overlap = args.chunk_overlap
+
     project_root = Path(__file__).resolve().parent.parent
-    uploads_dir = project_root / "data" / "uploads"
+    uploads_dir = args.uploads_dir or project_root / "data" / "uploads"
     if not uploads_dir.exists():
         print(f"Uploads directory not found: {uploads_dir}")
         sys.exit(1)
 
     pdfs = find_pdfs_in_uploads(uploads_dir)
     if not pdfs:
-        print("No PDF files found in data/uploads. Nothing to ingest.")
+        print(f"No PDF files found in {uploads_dir}. Nothing to ingest.")
         sys.exit(0)
 
     vs_dir = Path(settings.vector_store_dir)
+    collection = collection_for(args.tenant)
     if vs_dir.exists():
-        print(f"Removing existing vector store directory: {vs_dir}")
-        shutil.rmtree(vs_dir)
+        # Rebuild only this tenant's collection; other tenants' collections are left alone
+        print(f"Removing existing collection {collection!r} from {vs_dir}")
+        get_chroma_store(None, tenant=args.tenant).delete_collection()
 
-    print(f"Ingesting {len(pdfs)} PDF(s) from {uploads_dir} into vector store {vs_dir}...")
+    print(
+        f"Ingesting {len(pdfs)} PDF(s) from {uploads_dir} into collection {collection!r} at {vs_dir} "
+        f"(chunk_size={settings.chunk_size}, chunk_overlap={settings.chunk_overlap})..."
+    )
+    started = time.perf_counter()
+    profiler = StageProfiler() if args.profile else None
     try:
-        docs_count, chunks_count = ingest_file_paths(pdfs)
-        print(f"Ingestion complete: {docs_count} documents, {chunks_count} chunks.")
+        with profiler or nullcontext():
+            docs_count, chunks_count = ingest_file_paths(pdfs, tenant=args.tenant)
+        elapsed = time.perf_counter() - started
+        print(f"Ingestion complete: {docs_count} documents, {chunks_count} chunks, in {elapsed:.2f}s.")
     except Exception as e:
         print(f"Error during ingestion: {e}")
         sys.exit(2)
+    finally:
+        if profiler is not None and profiler.stages:
+            out = profiler.write(args.profile)
+            print(profiler.table())
+            print(f"Profile written to {out}")
+
+    if args.publish:
+        generation, _ = publish_snapshot()
+        print(f"Published generation {generation.number}: {generation.path}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Load the serving caches with the most frequent and most-liked questions from chat history:
+query embeddings, retrieval results and (with --answers or ANSWER_CACHE_ENABLED) /chat answers,
+all for the current index generation. Prints how many entries were warmed and how long it took.
+
+Only useful against a cache the workers share (CACHE_BACKEND=sqlite); with the in-memory
+cache, set PREWARM_ON_STARTUP=true so each worker warms itself instead.
+
+Usage: PYTHONPATH=. python scripts/prewarm.py [--tenant acme] [--max-questions 100] [--answers] [--json]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+
+from app.config import settings
+from app.prewarm import format_report, prewarm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tenant", action="append", default=None, help="warm only this tenant (repeatable; default all with history)")
+    parser.add_argument("--max-questions", type=int, default=None, help=f"questions per tenant (default {settings.prewarm_max_questions})")
+    parser.add_argument("--answers", action="store_true", default=None, help="also generate and cache /chat answers")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    if settings.cache_backend != "sqlite":
+        print("Warning: CACHE_BACKEND is not sqlite; warmed entries are lost when this process exits.", file=sys.stderr)
+
+    report = asyncio.run(prewarm(tenants=args.tenant, max_questions=args.max_questions, answers=args.answers))
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
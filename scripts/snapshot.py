@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Export the vector store to a portable snapshot, load one into an empty store, or
+publish the current collection as the next index generation for multi-worker serving.
+
+Usage:
+  PYTHONPATH=. python scripts/snapshot.py export snapshots/2025-10-26
+  PYTHONPATH=. python scripts/snapshot.py import snapshots/2025-10-26
+  PYTHONPATH=. python scripts/snapshot.py publish [--keep 2]
+
+Import does no embedding calls, so warming a new node takes seconds instead of a
+full re-ingest. Both commands print their elapsed time for comparison with
+scripts/ingest_from_uploads.py.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+
+from app.config import settings
+from app.snapshot import export_snapshot, import_snapshot, publish_snapshot
+from app.tenancy import collection_for
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="write the collection to a snapshot directory")
+    exp.add_argument("snapshot_dir")
+    exp.add_argument("--tenant", default=None, help="export this tenant's collection (default tenant if omitted)")
+    imp = sub.add_parser("import", help="load a snapshot into an empty collection")
+    imp.add_argument("snapshot_dir")
+    imp.add_argument("--tenant", default=None, help="import into this tenant's collection (default tenant if omitted)")
+    imp.add_argument("--force", action="store_true", help="import even if the embedding model differs")
+    pub = sub.add_parser("publish", help="export into a new generation under INDEX_ROOT and make it current")
+    pub.add_argument("--keep", type=int, default=2, help="generations to keep on disk (default 2)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        if args.command == "export":
+            print(f"Exporting collection {collection_for(args.tenant)!r} from {settings.vector_store_dir} to {args.snapshot_dir}...")
+            manifest = export_snapshot(args.snapshot_dir, tenant=args.tenant)
+        elif args.command == "publish":
+            print(f"Publishing all tenant collections as a new generation under {settings.index_root}...")
+            generation, manifest = publish_snapshot(keep=args.keep)
+            print(f"Generation {generation.number} is now current: {generation.path}")
+        else:
+            print(f"Importing {args.snapshot_dir} into collection {collection_for(args.tenant)!r} at {settings.vector_store_dir}...")
+            manifest = import_snapshot(args.snapshot_dir, force=args.force, tenant=args.tenant)
+    except Exception as e:
+        print(f"Error during {args.command}: {e}")
+        sys.exit(2)
+    elapsed = time.perf_counter() - started
+
+    print(
+        f"{args.command.capitalize()} complete: {manifest['count']} chunks, "
+        f"dimension {manifest['dimension']}, in {elapsed:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+import pytest
+
+from app import admission, cache, resilience, resilient_models
+from app.config import settings
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    """Keep every test's index, stores and caches under tmp_path, never in the working tree."""
+    monkeypatch.setattr(settings, "vector_store_dir", str(tmp_path / "chroma"))
+    monkeypatch.setattr(settings, "index_root", str(tmp_path / "index"))
+    monkeypatch.setattr(settings, "parse_cache_dir", str(tmp_path / "parse_cache"))
+    monkeypatch.setattr(settings, "shared_cache_path", str(tmp_path / "cache" / "shared_cache.sqlite3"))
+    # Process-wide singletons: a fresh cache, admission budget, breakers and hedge latencies per test
+    monkeypatch.setattr(cache, "_cache", None)
+    monkeypatch.setattr(admission, "_controllers", {})
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(resilient_models, "_query_latency", resilience.LatencyTracker())
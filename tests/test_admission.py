@@ -0,0 +1,176 @@
+import asyncio
+import gc
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    AdmittedStreamingResponse,
+    get_controller,
+    request_priority,
+)
+from app.config import settings
+
+
+def test_queue_full_is_429_and_queue_timeout_is_503():
+    async def scenario():
+        ctl = AdmissionController("test-bounds", max_in_flight=1, max_queue=1, queue_timeout=0.05)
+        slot = await ctl.hold()
+        queued = asyncio.create_task(ctl.hold())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as full:
+            await ctl.hold()
+        with pytest.raises(AdmissionRejected) as late:
+            await queued
+        slot.release()
+        slot.release()  # idempotent
+        return full.value, late.value, ctl
+
+    full, late, ctl = asyncio.run(scenario())
+    assert (full.status_code, late.status_code) == (429, 503)
+    assert full.retry_after >= 1
+    assert ctl.in_flight == 0 and ctl.queue_depth == 0
+
+
+def test_interactive_is_admitted_before_batch_and_sheds_it():
+    async def scenario():
+        ctl = AdmissionController("test-priority", max_in_flight=1, max_queue=2, queue_timeout=1.0)
+        order = []
+
+        async def worker(name, priority):
+            try:
+                async with ctl.slot(priority):
+                    order.append(name)
+            except AdmissionRejected as e:
+                order.append(f"{name}:{e.status_code}")
+
+        first = await ctl.hold()
+        tasks = [asyncio.create_task(worker(n, p)) for n, p in
+                 [("batch-1", "batch"), ("batch-2", "batch"), ("chat-1", "interactive")]]
+        await asyncio.sleep(0.01)
+        first.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    # chat-1 arrives to a full queue and sheds the newest batch request, then runs first
+    assert asyncio.run(scenario()) == ["batch-2:503", "chat-1", "batch-1"]
+
+
+def test_batch_cap_leaves_room_for_interactive():
+    async def scenario():
+        ctl = AdmissionController("test-shared", max_in_flight=2, max_queue=4, queue_timeout=1.0, limits={"batch": 1})
+        batch = await ctl.hold("batch", "chat_batch")
+        queued_batch = asyncio.create_task(ctl.hold("batch", "chat_batch"))
+        await asyncio.sleep(0)
+        # the second batch request waits on the batch cap; a chat request still gets the free slot
+        chat = await asyncio.wait_for(ctl.hold("interactive", "chat"), timeout=0.1)
+        assert not queued_batch.done()
+        batch.release()
+        (await queued_batch).release()
+        chat.release()
+        return ctl
+
+    ctl = asyncio.run(scenario())
+    assert ctl.in_flight == 0 and sum(ctl.running.values()) == 0
+
+
+def test_weighted_batch_hold_is_clamped_to_the_batch_budget():
+    async def scenario():
+        ctl = AdmissionController("test-weight", max_in_flight=4, max_queue=4, queue_timeout=0.05, limits={"batch": 2})
+        batch = await ctl.hold("batch", "chat_batch", weight=8)
+        assert (batch.weight, ctl.in_flight) == (2, 2)
+        with pytest.raises(AdmissionRejected):
+            await ctl.hold("batch", "chat_batch")  # the batch budget is used up
+        chats = [await ctl.hold("interactive", "chat") for _ in range(2)]
+        batch.release()
+        for chat in chats:
+            chat.release()
+        return ctl
+
+    assert asyncio.run(scenario()).in_flight == 0
+
+
+def test_priority_header_can_only_lower_priority():
+    assert request_priority("interactive", "batch") == "batch"
+    assert request_priority("batch", "interactive") == "batch"
+    assert request_priority("bogus", "interactive") == "interactive"
+    assert request_priority(None, "batch") == "batch"
+
+
+def test_cancelled_batch_retrieval_releases_its_slot(monkeypatch):
+    from app.models import BatchChatRequest
+    from app.routes import chat as chat_routes
+
+    monkeypatch.setattr(settings, "llm_provider", "fake")
+
+    async def cancelled(*args):
+        raise asyncio.CancelledError()
+
+    monkeypatch.setattr(chat_routes, "retrieve_batch", cancelled)
+
+    async def scenario():
+        with pytest.raises(asyncio.CancelledError):
+            await chat_routes.chat_batch(BatchChatRequest(questions=["q"]), tenant="default", x_priority=None)
+        return get_controller()
+
+    assert asyncio.run(scenario()).in_flight == 0
+
+
+def test_unsent_batch_response_releases_its_slot():
+    async def scenario():
+        ctl = AdmissionController("test-unsent", max_in_flight=1, max_queue=0, queue_timeout=0.05)
+
+        async def body():
+            yield b"never sent"
+
+        AdmittedStreamingResponse(body(), await ctl.hold("batch"))
+        gc.collect()
+        (await ctl.hold("batch")).release()
+        return ctl
+
+    assert asyncio.run(scenario()).in_flight == 0
+
+
+def test_chat_endpoint_rejects_with_retry_after(monkeypatch):
+    monkeypatch.setattr(settings, "admission_max_in_flight", 0)
+    monkeypatch.setattr(settings, "admission_max_queue", 0)
+    from app.main import app
+
+    r = TestClient(app).post("/chat", json={"question": "hello?"})
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) >= 1
+
+
+def test_queued_chat_requests_time_out_while_one_runs(monkeypatch):
+    import time
+
+    import httpx
+    from langchain_core.documents import Document
+
+    from app.llm import get_embeddings
+    from app.main import app
+    from app.vector_store import get_vector_store
+
+    monkeypatch.setattr(settings, "llm_provider", "fake")
+    monkeypatch.setattr(settings, "fake_llm_latency_ms", 300)
+    monkeypatch.setattr(settings, "admission_max_in_flight", 1)
+    monkeypatch.setattr(settings, "admission_queue_timeout_seconds", 0.1)
+    get_vector_store(get_embeddings()).add_documents([Document(page_content="the sky is blue")])
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = time.monotonic()
+
+            async def ask(i):
+                r = await client.post("/chat", json={"question": f"sky {i}?"})
+                return r.status_code, time.monotonic() - started
+
+            return await asyncio.gather(*(ask(i) for i in range(3)))
+
+    results = asyncio.run(scenario())
+    assert sorted(status for status, _ in results) == [200, 503, 503]
+    # rejected at the queue timeout, not after the admitted request's 300ms generation
+    assert all(elapsed < 0.25 for status, elapsed in results if status == 503)
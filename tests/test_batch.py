@@ -0,0 +1,157 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+
+from app import batch
+from app.config import settings
+from app.fake_provider import FakeResponse
+
+
+class TrackingChatModel:
+    """Answers after a per-question delay and records the peak number of concurrent calls."""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.active = 0
+        self.peak = 0
+
+    async def ainvoke_with_model(self, prompt):
+        return await self.ainvoke(prompt), settings.llm_model
+
+    async def ainvoke(self, prompt):
+        question = prompt.split("Question: ", 1)[1].split("\n", 1)[0]
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delays.get(question, 0.01))
+        finally:
+            self.active -= 1
+        return FakeResponse(f"answer to {question}")
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "llm_provider", "fake")
+    from app.llm import get_embeddings
+    from app.vector_store import get_vector_store
+
+    vs = get_vector_store(get_embeddings(cached=False))
+    vs.add_documents([Document(page_content=f"fact {i}", metadata={"source": "facts.txt"}) for i in range(6)])
+    return vs
+
+
+def test_batch_streams_in_completion_order_within_concurrency(store, monkeypatch):
+    llm = TrackingChatModel({"slow": 0.3})
+    monkeypatch.setattr(batch, "get_chat_model", lambda temperature: llm)
+    from app.main import app
+
+    questions = ["slow", "a", "b", "c", "d"]
+    r = TestClient(app).post("/chat/batch", json={"questions": questions, "concurrency": 2})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in r.text.splitlines()]
+
+    assert sorted(line["index"] for line in lines) == list(range(5))
+    assert lines[-1]["index"] == 0  # the slow question finishes last, not first
+    assert all(line["answer"] == f"answer to {questions[line['index']]}" for line in lines)
+    assert all(line["sources"] for line in lines)
+    assert llm.peak == 2
+
+
+def test_batch_fan_out_is_capped_by_its_admission_budget(store, monkeypatch):
+    monkeypatch.setattr(settings, "batch_admission_max_in_flight", 2)
+    llm = TrackingChatModel({})
+    monkeypatch.setattr(batch, "get_chat_model", lambda temperature: llm)
+    from app.admission import get_controller
+    from app.main import app
+
+    # X-Priority can only lower a request's priority: this still runs (and is capped) as batch
+    r = TestClient(app).post(
+        "/chat/batch",
+        json={"questions": [f"q{i}" for i in range(6)], "concurrency": 8},
+        headers={"X-Priority": "interactive"},
+    )
+    assert r.status_code == 200 and len(r.text.splitlines()) == 6
+    assert llm.peak == 2
+    assert get_controller().in_flight == 0
+
+
+def test_batch_rejects_oversized_request(monkeypatch):
+    monkeypatch.setattr(settings, "llm_provider", "fake")
+    monkeypatch.setattr(settings, "batch_max_questions", 3)
+    from app.main import app
+
+    r = TestClient(app).post("/chat/batch", json={"questions": ["q"] * 4})
+    assert r.status_code == 413
+
+
+def test_batch_errors_are_reported_with_status_or_per_line(store, monkeypatch):
+    from app.main import app
+    from app.routes import chat as chat_routes
+
+    async def broken_retrieval(*args):
+        raise RuntimeError("store unavailable")
+
+    with monkeypatch.context() as m:
+        m.setattr(chat_routes, "retrieve_batch", broken_retrieval)
+        r = TestClient(app).post("/chat/batch", json={"questions": ["a", "b"]})
+    assert r.status_code == 500
+
+    def broken_llm(temperature):
+        raise RuntimeError("provider misconfigured")
+
+    monkeypatch.setattr(batch, "get_chat_model", broken_llm)
+    r = TestClient(app).post("/chat/batch", json={"questions": ["a", "b"]})
+    assert r.status_code == 200
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert [(line["index"], line["error"]) for line in lines] == [(0, "provider misconfigured"), (1, "provider misconfigured")]
+
+
+def test_run_batch_returns_input_order(store, monkeypatch):
+    monkeypatch.setattr(batch, "get_chat_model", lambda temperature: TrackingChatModel({"first": 0.1}))
+    results = batch.run_batch(["first", "second", "third"], concurrency=3)
+    assert [r.index for r in results] == [0, 1, 2]
+    assert [r.answer for r in results] == ["answer to first", "answer to second", "answer to third"]
+
+
+def test_query_by_vectors_matches_similarity_search(store):
+    from app.vector_store import query_by_vectors
+
+    queries = ["fact 1", "fact 4"]
+    vectors = [store.embeddings.embed_query(q) for q in queries]
+    batched = query_by_vectors(store, vectors, k=2)
+    for query, hits in zip(queries, batched):
+        expected = store.similarity_search_with_score(query, k=2)
+        assert [(d.page_content, round(s, 5)) for d, s in hits] == [(d.page_content, round(s, 5)) for d, s in expected]
+        assert all(d.id for d, _ in hits)
+
+
+def test_batch_chat_script(store, tmp_path):
+    questions = tmp_path / "questions.txt"
+    questions.write_text("what is fact 1?\n\nwhat is fact 2?\n", encoding="utf-8")
+    out = tmp_path / "results.jsonl"
+    root = Path(__file__).resolve().parent.parent
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(root),
+        "LLM_PROVIDER": "fake",
+        "VECTOR_STORE_DIR": settings.vector_store_dir,
+        "INDEX_ROOT": settings.index_root,
+        "FAKE_LLM_LATENCY_MS": "0",
+    }
+    proc = subprocess.run(
+        [sys.executable, str(root / "scripts" / "batch_chat.py"), str(questions), "-o", str(out)],
+        env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr
+    results = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [r["index"] for r in results] == [0, 1]
+    assert all(r["answer"] and not r["error"] for r in results)
+    assert "Answered 2/2" in proc.stderr
@@ -6,3 +6,33 @@ def test_health():
     r = client.get('/health')
     assert r.status_code == 200
     assert r.json() == {"status": "ok"}
+
+
+def test_ready_reports_cold_until_warmed():
+    client = TestClient(app)
+    r = client.get('/ready')
+    assert r.status_code == 503
+    assert r.json()["status"] == "cold"
+
+
+def test_ready_when_warmup_disabled(monkeypatch):
+    from app import warmup
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "warmup_on_startup", False)
+    monkeypatch.setattr(warmup, "state", warmup.WarmupState())
+    with TestClient(app) as client:
+        r = client.get('/ready')
+    assert r.status_code == 200
+    assert r.json()["status"] == "skipped"
+
+
+def test_failed_warmup_is_retried(monkeypatch):
+    import asyncio
+
+    from app import warmup
+
+    outcomes = iter([False, False, True])
+    monkeypatch.setattr(warmup, "warm_up", lambda: next(outcomes))
+    asyncio.run(asyncio.wait_for(warmup.warm_up_until_ready(initial_delay=0.01, max_delay=0.02), timeout=2))
+    assert next(outcomes, "exhausted") == "exhausted"
@@ -0,0 +1,20 @@
+from app import ingest
+from app.config import settings
+
+
+def test_load_documents_reuses_parse_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "parse_cache_dir", str(tmp_path / "cache"))
+    src = tmp_path / "notes.txt"
+    src.write_text("hello cache", encoding="utf-8")
+
+    first = ingest._load_documents([src])
+    assert first[0].page_content == "hello cache"
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+
+    def _fail(path):
+        raise AssertionError("loader should not run on a cache hit")
+
+    monkeypatch.setattr(ingest, "_loader_for", _fail)
+    second = ingest._load_documents([src])
+    assert [d.page_content for d in second] == ["hello cache"]
+    assert second[0].metadata["source"] == str(src)
@@ -0,0 +1,84 @@
+import asyncio
+from collections import Counter
+
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+
+from app.config import settings
+from app.prewarm import rank_questions, tenants_with_history, warm_tenant
+
+
+def test_rank_questions_boosts_liked_answers(monkeypatch):
+    monkeypatch.setattr(settings, "prewarm_like_weight", 3)
+    counts = Counter({"popular": 5, "rare": 1, "liked": 2, "  ": 9})
+    likes = Counter({"liked": 2})
+    assert rank_questions(counts, likes, limit=2) == ["liked", "popular"]
+
+
+def test_tenants_with_history_includes_pre_tenancy_messages():
+    class Messages:
+        def __init__(self, rows):
+            self.rows = rows
+            self.pipelines = []
+
+        async def aggregate(self, pipeline):
+            self.pipelines.append(pipeline)
+            for row in self.rows:
+                yield row
+
+    class Db:
+        messages = Messages([{"_id": None}, {"_id": "acme"}, {"_id": "Not A Tenant!"}])
+
+    assert asyncio.run(tenants_with_history(Db())) == ["acme", settings.default_tenant]
+    # grouped with $ifNull, so documents lacking tenant_id show up as None
+    assert Db.messages.pipelines[0][-1]["$group"]["_id"] == {"$ifNull": ["$tenant_id", None]}
+
+
+def test_warm_tenant_fills_caches_used_by_chat(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "llm_provider", "fake")
+    monkeypatch.setattr(settings, "answer_cache_enabled", True)
+    from app.llm import get_embeddings
+    from app.vector_store import get_vector_store
+
+    get_vector_store(get_embeddings(cached=False)).add_documents([Document(page_content="the sky is blue")])
+
+    report = asyncio.run(warm_tenant("default", ["what colour is the sky?"], answers=True))
+    # question + first-turn conversation query, for both embeddings and retrieval
+    assert (report["embeddings"], report["retrieval"], report["answers"]) == (2, 2, 1)
+    assert report["generation"] == {"number": 0, "tenant_writes": 0}
+    again = asyncio.run(warm_tenant("default", ["what colour is the sky?"], answers=True))
+    assert (again["embeddings"], again["retrieval"], again["answers"]) == (0, 0, 0)
+
+    from app.main import app
+
+    monkeypatch.setattr(settings, "fake_llm_latency_ms", 5000)  # a cache miss would time out
+    monkeypatch.setattr(settings, "request_deadline_seconds", 0.5)
+    r = TestClient(app).post("/chat", json={"question": "what colour is the sky?"})
+    assert r.status_code == 200
+    assert r.json()["sources"][0]["content"] == "the sky is blue"
+
+
+def test_fallback_answers_are_not_cached(tmp_path, monkeypatch):
+    from app.answer_cache import answer_key, get_answer
+    from app.llm import get_embeddings
+    from app.main import app
+    from app.resilience import get_breaker
+    from app.vector_store import get_vector_store
+
+    monkeypatch.setattr(settings, "llm_provider", "fake")
+    monkeypatch.setattr(settings, "answer_cache_enabled", True)
+    monkeypatch.setattr(settings, "llm_fallback_model", "fake-cheap")
+    get_vector_store(get_embeddings(cached=False)).add_documents([Document(page_content="the sky is blue")])
+
+    breaker = get_breaker(f"llm:{settings.llm_model}")
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    try:
+        r = TestClient(app).post("/chat", json={"question": "sky?"})
+        assert r.status_code == 200 and r.json()["answer"].startswith("[fake-cheap]")
+        assert get_answer(answer_key("sky?", 4, 0.2)) is None
+    finally:
+        breaker.record_success()
+
+    r = TestClient(app).post("/chat", json={"question": "sky?"})
+    assert get_answer(answer_key("sky?", 4, 0.2))["answer"] == r.json()["answer"]
@@ -0,0 +1,54 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.profiling import StageProfiler, stage
+
+
+def test_stage_profiler_reports_cpu_and_peak_memory(tmp_path):
+    with stage("ignored"):
+        pass  # no profiler active: nothing recorded anywhere
+
+    with StageProfiler() as prof:
+        with stage("allocate"):
+            blob = [bytearray(1024) for _ in range(2048)]
+            with stage("inner"):
+                sum(range(10000))
+        del blob
+    out = prof.write(tmp_path / "profile")
+
+    stages = json.loads((out / "stages.json").read_text())
+    assert [s["stage"] for s in stages] == ["inner", "allocate"]
+    assert stages[1]["peak_traced_mb"] >= 2
+    assert (out / "allocate.prof").exists() and not (out / "inner.prof").exists()
+    assert "allocate" in (out / "summary.txt").read_text()
+
+
+def test_nested_stage_keeps_outer_peak():
+    with StageProfiler(cprofile=False) as prof:
+        with stage("outer"):
+            blob = bytearray(8 * 2**20)
+            del blob  # outer's peak happens before the nested stage starts
+            with stage("inner"):
+                small = bytearray(1024)
+            del small
+    inner, outer = prof.stages
+    assert inner["peak_traced_mb"] < 8
+    assert outer["peak_traced_mb"] >= 8
+
+
+def test_admin_profile_requires_token(monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", "s3cret")
+    from app.routes import admin
+
+    app = FastAPI()
+    app.include_router(admin.router)
+    client = TestClient(app)
+
+    assert client.get("/admin/profile/cpu", params={"seconds": 0.05}).status_code == 403
+    r = client.get("/admin/profile/memory", params={"seconds": 0.05}, headers={"X-Admin-Token": "s3cret"})
+    assert r.status_code == 200 and "peak_mb" in r.json()
+    r = client.get("/admin/profile/cpu", params={"seconds": 0.05}, headers={"X-Admin-Token": "s3cret"})
+    assert r.status_code == 200
@@ -0,0 +1,145 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+
+from app import metrics
+from app.config import settings
+from app.fake_provider import FakeChatModel, FakeEmbeddings
+from app.resilience import CircuitOpenError, DeadlineExceeded, deadline_scope
+from app.resilient_models import ResilientChatModel, ResilientEmbeddings
+
+
+def test_breaker_opens_then_uses_fallback(monkeypatch):
+    monkeypatch.setattr(settings, "breaker_failure_threshold", 2)
+    primary = FakeChatModel(model="test-breaker", fail=lambda: True)
+    llm = ResilientChatModel(primary)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            llm.invoke("q")
+    with pytest.raises(CircuitOpenError):
+        llm.invoke("q")
+    assert primary.calls == 2
+
+    with_fallback = ResilientChatModel(primary, fallback=FakeChatModel(model="test-cheap"))
+    assert with_fallback.invoke("q").content.startswith("[test-cheap]")
+    assert primary.calls == 2
+
+
+def test_deadline_bounds_slow_generation():
+    llm = ResilientChatModel(FakeChatModel(model="test-slow", latency=lambda: 1.0))
+    started = time.monotonic()
+    with deadline_scope(0.1), pytest.raises(DeadlineExceeded):
+        llm.invoke("q")
+    assert time.monotonic() - started < 0.5
+
+
+def test_slow_embedding_call_is_hedged(monkeypatch):
+    monkeypatch.setattr(settings, "hedge_min_samples", 5)
+    latencies = iter([0.01] * 5 + [1.0] + [0.01] * 5)
+    emb = ResilientEmbeddings(FakeEmbeddings(size=8, latency=lambda: next(latencies)), "test-hedge")
+    for _ in range(5):
+        emb.embed_query("warm")
+    before = metrics.snapshot()["counters"].get("hedges_fired{name=embeddings:test-hedge}", 0)
+
+    started = time.monotonic()
+    assert emb.embed_query("slow") == FakeEmbeddings(size=8).embed_query("slow")
+    assert time.monotonic() - started < 0.5
+    assert metrics.snapshot()["counters"]["hedges_fired{name=embeddings:test-hedge}"] == before + 1
+
+
+def test_chat_returns_504_when_provider_exceeds_deadline(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "llm_provider", "fake")
+    monkeypatch.setattr(settings, "request_deadline_seconds", 0.2)
+    monkeypatch.setattr(settings, "fake_llm_latency_ms", 1000)
+    from app.llm import get_embeddings
+    from app.main import app
+    from app.vector_store import get_vector_store
+
+    get_vector_store(get_embeddings()).add_documents([Document(page_content="the sky is blue")])
+    r = TestClient(app).post("/chat", json={"question": "what colour is the sky?"})
+    assert r.status_code == 504
+
+
+def test_batched_query_embeddings_are_not_hedged(monkeypatch):
+    monkeypatch.setattr(settings, "hedge_min_samples", 5)
+    inner = FakeEmbeddings(size=8, latency=lambda: 0.01)
+    emb = ResilientEmbeddings(inner, "test-batch-hedge")
+    for _ in range(5):
+        emb.embed_query("warm")
+    inner.latency = lambda: 0.2  # a batch takes far longer than the single-query p95
+    before = inner.calls
+    assert len(emb.embed_queries([f"q{i}" for i in range(50)])) == 50
+    assert inner.calls - before == 1  # one batched call, no duplicate
+
+
+def test_large_query_batches_are_sent_in_bounded_slices():
+    inner = FakeEmbeddings(size=8)
+    vectors = ResilientEmbeddings(inner, "test-batch-slices").embed_queries([f"q{i}" for i in range(130)])
+    assert vectors[129] == inner.embed_query("q129")
+    assert inner.calls == 3 + 1  # 64 + 64 + 2, then the check above
+
+
+def test_retrieve_hedges_a_slow_query_embedding(monkeypatch):
+    from app.retrieval import retrieve
+    from app.vector_store import get_vector_store
+
+    monkeypatch.setattr(settings, "hedge_min_samples", 5)
+    inner = FakeEmbeddings(size=8, latency=lambda: 0.01)
+    vs = get_vector_store(ResilientEmbeddings(inner, "test-retrieve-hedge"))
+    vs.add_documents([Document(page_content="the sky is blue")])
+    for i in range(5):
+        retrieve(vs, f"warm {i}", k=1)
+    before = metrics.snapshot()["counters"].get("hedges_fired{name=embeddings:test-retrieve-hedge}", 0)
+
+    latencies = iter([1.0, 0.01])
+    inner.latency = lambda: next(latencies)
+    started = time.monotonic()
+    assert retrieve(vs, "slow", k=1)[0][0].page_content == "the sky is blue"
+    assert time.monotonic() - started < 0.5
+    assert metrics.snapshot()["counters"]["hedges_fired{name=embeddings:test-retrieve-hedge}"] == before + 1
+
+
+def test_slow_generation_does_not_block_the_event_loop(monkeypatch):
+    import asyncio
+
+    import httpx
+
+    monkeypatch.setattr(settings, "llm_provider", "fake")
+    monkeypatch.setattr(settings, "fake_llm_latency_ms", 300)
+    from app.llm import get_embeddings
+    from app.main import app
+    from app.vector_store import get_vector_store
+
+    get_vector_store(get_embeddings()).add_documents([Document(page_content="the sky is blue")])
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            started = time.monotonic()
+            chats = [asyncio.create_task(client.post("/chat", json={"question": f"sky {i}?"})) for i in range(4)]
+            await asyncio.sleep(0.05)
+            health = await client.get("/health")
+            health_after = time.monotonic() - started
+            responses = await asyncio.gather(*chats)
+            return health, health_after, responses, time.monotonic() - started
+
+    health, health_after, responses, total = asyncio.run(scenario())
+    assert health.status_code == 200 and health_after < 0.2
+    assert [r.status_code for r in responses] == [200] * 4
+    assert total < 0.9  # generated concurrently, not one after another
+
+
+def test_exhausted_request_budget_does_not_trip_breaker(monkeypatch):
+    monkeypatch.setattr(settings, "breaker_failure_threshold", 2)
+    primary = FakeChatModel(model="test-budget")
+    llm = ResilientChatModel(primary)
+    for _ in range(3):
+        with deadline_scope(0.001):
+            time.sleep(0.01)  # budget spent elsewhere (e.g. a slow database)
+            with pytest.raises(DeadlineExceeded):
+                llm.invoke("q")
+    assert primary.calls == 0
+    assert llm.breaker.state == "closed"
+    assert llm.invoke("q").content
@@ -0,0 +1,34 @@
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.config import settings
+from app.generation import bump_generation
+from app.retrieval import retrieve
+from app.vector_store import get_vector_store
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    calls: int = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return super().embed_query(text)
+
+
+def test_retrieval_cache_hits_until_generation_bump(tmp_path, monkeypatch):
+    emb = CountingEmbeddings(size=8)
+    vs = get_vector_store(emb)
+    vs.add_documents([Document(page_content=f"chunk {i}") for i in range(4)])
+
+    first = retrieve(vs, "chunk 3", k=2)
+    assert emb.calls == 1
+    second = retrieve(vs, "chunk 3", k=2)
+    assert emb.calls == 1
+    assert [(d.id, d.page_content, s) for d, s in second] == [(d.id, d.page_content, s) for d, s in first]
+
+    retrieve(vs, "chunk 3", k=3)
+    assert emb.calls == 2
+
+    bump_generation()
+    retrieve(vs, "chunk 3", k=2)
+    assert emb.calls == 3
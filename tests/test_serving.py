@@ -0,0 +1,77 @@
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.cache import SQLiteCache
+from app.config import settings
+from app.snapshot import publish_snapshot
+from app.vector_store import get_chroma_store, get_vector_store
+
+
+def test_snapshot_backend_matches_chroma_and_swaps_generation(tmp_path, monkeypatch):
+    emb = DeterministicFakeEmbedding(size=8)
+    chroma = get_chroma_store(emb)
+    chroma.add_documents([Document(page_content=f"chunk {i}", metadata={"source": "a.pdf"}) for i in range(4)])
+    expected_doc, expected_score = chroma.similarity_search_with_score("chunk 2", k=1)[0]
+
+    generation, _ = publish_snapshot()
+    assert generation.number == 1
+    monkeypatch.setattr(settings, "index_backend", "snapshot")
+    doc, score = get_vector_store(emb).similarity_search_with_score("chunk 2", k=1)[0]
+    assert doc.page_content == expected_doc.page_content
+    assert abs(score - expected_score) < 1e-4
+
+    chroma.add_documents([Document(page_content="chunk 4", metadata={"source": "b.pdf"})])
+    generation, _ = publish_snapshot()
+    assert generation.number == 2
+    assert len(get_vector_store(emb).index) == 5
+
+
+def test_sqlite_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    writer = SQLiteCache(path, max_entries=100, ttl_seconds=60)
+    reader = SQLiteCache(path, max_entries=100, ttl_seconds=60)
+    writer.set("ns", "k", {"ids": ["a", "b"], "scores": [0.1, 0.2]})
+    assert reader.get("ns", "k") == {"ids": ["a", "b"], "scores": [0.1, 0.2]}
+    assert reader.get("other", "k") is None
+
+
+def test_sqlite_cache_lock_errors_are_misses(tmp_path, caplog):
+    import sqlite3
+
+    class LockedConnection:
+        def execute(self, *args):
+            raise sqlite3.OperationalError("database is locked")
+
+        def rollback(self):
+            pass
+
+    cache = SQLiteCache(str(tmp_path / "shared.sqlite3"), max_entries=100, ttl_seconds=60)
+    cache.set("ns", "k", 1)
+    cache._conn = LockedConnection
+    assert cache.get("ns", "k") is None
+    cache.clear("ns")  # logged, not raised
+    assert "Could not clear shared cache" in caplog.text
+
+    def locked_open():
+        # a new connection's PRAGMAs can be the first statement to hit the lock
+        raise sqlite3.OperationalError("database is locked")
+
+    cache._conn = locked_open
+    cache.set("ns", "k2", 2)  # skipped, not raised
+    assert cache.get("ns", "k2") is None
+
+
+def test_generation_stamp_sees_rewrites_within_one_mtime_tick(tmp_path, monkeypatch):
+    import os
+
+    from app.generation import bump_generation, read_current
+
+    bump_generation()
+    current = tmp_path / "index" / "CURRENT"
+    before = current.stat()
+    assert read_current().number == 1
+    bump_generation()
+    # same size and mtime as the previous CURRENT: only the inode (new file via os.replace) differs
+    os.utime(current, ns=(before.st_atime_ns, before.st_mtime_ns))
+    assert current.stat().st_size == before.st_size
+    assert read_current().number == 2
@@ -0,0 +1,27 @@
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.config import settings
+from app.snapshot import export_snapshot, import_snapshot
+from app.vector_store import get_vector_store
+
+
+def test_snapshot_round_trip(tmp_path, monkeypatch):
+    emb = DeterministicFakeEmbedding(size=8)
+    monkeypatch.setattr(settings, "vector_store_dir", str(tmp_path / "src"))
+    get_vector_store(emb).add_documents(
+        [Document(page_content=f"chunk {i}", metadata={"source": f"doc{i}.pdf"}) for i in range(3)]
+    )
+    manifest = export_snapshot(str(tmp_path / "snap"))
+    assert manifest["count"] == 3
+    assert manifest["dimension"] == 8
+
+    monkeypatch.setattr(settings, "vector_store_dir", str(tmp_path / "dst"))
+    import_snapshot(str(tmp_path / "snap"))
+    hits = get_vector_store(emb).similarity_search("chunk 1", k=1)
+    assert hits[0].page_content == "chunk 1"
+    assert hits[0].metadata["source"] == "doc1.pdf"
+
+    with pytest.raises(ValueError):
+        import_snapshot(str(tmp_path / "snap"))
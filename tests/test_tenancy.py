@@ -0,0 +1,48 @@
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+
+from app.config import settings
+from app.fake_provider import FakeEmbeddings
+from app.generation import bump_generation, read_current
+from app.main import app
+from app.retrieval import retrieve
+from app.tenancy import collection_for, resolve_tenant
+from app.vector_store import get_vector_store, list_tenants
+
+
+def test_tenant_collections_are_isolated(tmp_path, monkeypatch):
+    emb = FakeEmbeddings(size=8)
+    get_vector_store(emb, tenant="acme").add_documents([Document(page_content="acme pricing")])
+    get_vector_store(emb, tenant="globex").add_documents([Document(page_content="globex pricing")])
+
+    hits = retrieve(get_vector_store(emb, tenant="acme"), "pricing", k=4, tenant="acme")
+    assert [d.page_content for d, _ in hits] == ["acme pricing"]
+    assert {"acme", "globex"} <= set(list_tenants())
+
+    bump_generation("globex")
+    assert read_current().stamp("acme") == (0, 0)
+    assert read_current().stamp("globex") == (0, 1)
+
+
+def test_default_tenant_keeps_collection_name():
+    assert collection_for(None) == settings.collection_name
+    assert collection_for("acme") == f"{settings.collection_name}__t_acme"
+    with pytest.raises(ValueError):
+        resolve_tenant("../etc")
+
+
+def test_invalid_tenant_header_is_rejected():
+    r = TestClient(app).post("/chat", json={"question": "hi"}, headers={"X-Tenant-ID": "bad tenant!"})
+    assert r.status_code == 400
+
+
+def test_default_tenant_setting_is_normalised(monkeypatch):
+    from app.config import Settings
+
+    monkeypatch.setenv("DEFAULT_TENANT", "  Acme ")
+    loaded = Settings()
+    assert loaded.default_tenant == "acme"
+    monkeypatch.setattr(settings, "default_tenant", loaded.default_tenant)
+    # the default tenant keeps the unsuffixed collection however the header spells it
+    assert collection_for(None) == collection_for(" ACME") == settings.collection_name